@@ -1,134 +1,158 @@
 import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
 import pandas as pd
-import platform
+import numpy as np
+import os
 from datetime import datetime
 
+from buoyancy_cache import calc_key, input_key, shared_cache
+from buoyancy_countermeasure import DEFAULT_COSTS, MEASURES, describe, optimize_countermeasures
+from buoyancy_drawing import draw_fs_heatmap, plan_svg, png_bytes, section_svg
+from buoyancy_engine import (
+    SEQUENCE_METHODS, buildable_states, calc_details, construction_stages, critical_gwl, explore_sequences, flat_inputs,
+    floor_load_bot, floor_load_mid, fs_curve, roof_load, with_stages,
+)
+from buoyancy_graph import build_graph
+from buoyancy_grid import BayGrid
+from buoyancy_library import ScenarioLibrary, ScenarioRow
+from buoyancy_monitor import GroundwaterMonitor, MonitorThread, simulate, socket_readings, tail_csv
+from buoyancy_profile import get_profiler
+from buoyancy_reliability import default_distributions, monte_carlo, ranking
+from buoyancy_report import report_bytes
+
 # 페이지 설정
 st.set_page_config(layout="wide", page_title="시공단계 부력 검토")
+profiler = get_profiler(st.session_state, st.query_params)
+profiler.begin("full")
+result_cache = shared_cache()
 
 # 스타일 설정 (이전 화면의 사용자 정의 스타일 복구)
-st.markdown(
-    """
-    <style>
-    /* 전체 글꼴 크기 축소 */
-    html, body, [class*="css"], .stMarkdown {
-        font-size: 13px !important;
-    }
-    
-    /* 상단 여백 최소화 */
-    .block-container {
-        padding-top: 1.0rem !important;
-        padding-bottom: 0rem !important;
-    }
-    [data-testid="stSidebarNav"] { padding-top: 0.5rem !important; }
-    
-    /* 입력창 및 타이틀 크기 축소 */
-    h1 { font-size: 1.4rem !important; margin-bottom: 0.4rem !important; padding: 0 !important; }
-    h2 { font-size: 1.1rem !important; margin-top: 0.8rem !important; margin-bottom: 0.4rem !important; }
-    h3 { font-size: 0.95rem !important; margin-bottom: 0.3rem !important; }
-    
-    /* 입력창 디자인 - 바탕 흰색 및 회색 테두리 적용 */
-    div[data-baseweb="input"], [data-baseweb="base-input"], div[data-baseweb="number-input"] { 
-        background-color: #ffffff !important; 
-        border: 1px solid #ddd !important; 
-        border-radius: 4px !important;
-        box-shadow: none !important;
-        min-height: 26px !important;
-        height: auto !important;
-    }
-    /* 탭 하단 선 제거 */
-    div[data-baseweb="tab-highlight"] { display: none !important; }
-    div[data-baseweb="tab-list"] { border-bottom: none !important; }
-    input[type=number] { 
-        -moz-appearance: textfield; 
-        font-size: 12px !important; 
-        padding: 4px 8px !important;
-    }
-    
-    /* 라벨 관련 스타일 - 겹침 방지 */
-    div[data-testid="stWidgetLabel"] p {
-        font-size: 11.5px !important;
-        margin-bottom: 2px !important;
-        line-height: 1.2 !important;
-    }
-    
-    /* 요소 간격 조절 - 음수 마진 제거 및 최적화 */
-    .stNumberInput { margin-bottom: 2px !important; }
-    .stCheckbox { margin-bottom: 2px !important; }
-    div[data-testid="stVerticalBlock"] > div { border: none !important; gap: 0.2rem !important; }
-    
-    /* 사이드바 여백 축소 */
-    div[data-testid="stSidebar"] div[data-testid="stVerticalBlock"] { gap: 0.1rem !important; }
-    hr { margin: 0.5rem 0 !important; }
-    
-    .sub-title { 
-        background-color: #4A5568; color: white; padding: 2px 8px; border-radius: 4px; 
-        font-weight: bold; margin-top: 3px; margin-bottom: 2px; font-size: 11px; 
-    }
-    .section-title { 
-        color: #2D3748; border-bottom: 1.5px solid #2D3748; padding-bottom: 2px; 
-        margin-top: 8px; margin-bottom: 6px; font-weight: bold; font-size: 14.5px;
-    }
-    .result-container-ok { 
-        background-color: #1976d2; color: white; padding: 8px; border-radius: 6px; 
-        text-align: center; font-size: 16px; font-weight: bold; margin: 8px 0; 
-    }
-    .result-container-ng { 
-        background-color: #d32f2f; color: white; padding: 8px; border-radius: 6px; 
-        text-align: center; font-size: 16px; font-weight: bold; margin: 8px 0; 
-    }
-    
-    /* 메트릭(결과 수치) 크기 축소 */
-    div[data-testid="stMetricValue"] { font-size: 1.4rem !important; font-weight: bold !important; }
-    div[data-testid="stMetricLabel"] { font-size: 0.8rem !important; }
-    
-    /* 탭 스타일 조정 */
-    button[data-baseweb="tab"] { padding: 4px 12px !important; font-size: 12px !important; }
-    
-    /* 테이블 열 너비 및 텍스트 최적화 */
-    div[data-testid="stTable"] table { width: 100% !important; border: 1px solid #ddd !important; }
-    div[data-testid="stTable"] th, div[data-testid="stTable"] td { padding: 4px 6px !important; font-size: 11px !important; border: 1px solid #eee !important; }
-    
-    div[data-testid="stTable"] th:nth-child(1), div[data-testid="stTable"] td:nth-child(1) { display: none !important; }
-    div[data-testid="stTable"] th:nth-child(2), div[data-testid="stTable"] td:nth-child(2) { width: 110px !important; background-color: #fdfdfd; }
-    div[data-testid="stTable"] th:nth-child(4), div[data-testid="stTable"] td:nth-child(4) { width: 95px !important; text-align: right !important; font-weight: bold; }
-
-    /* 이미지 중앙 정렬 */
-    [data-testid="stImage"] {
-        display: flex !important;
-        justify-content: center !important;
-    }
-    [data-testid="stImage"] img {
-        margin: 0 auto !important;
-    }
+with profiler.section("css"):
+    st.markdown(
+        """
+        <style>
+        /* 전체 글꼴 크기 축소 */
+        html, body, [class*="css"], .stMarkdown {
+            font-size: 13px !important;
+        }
+        
+        /* 상단 여백 최소화 */
+        .block-container {
+            padding-top: 1.0rem !important;
+            padding-bottom: 0rem !important;
+        }
+        [data-testid="stSidebarNav"] { padding-top: 0.5rem !important; }
+        
+        /* 입력창 및 타이틀 크기 축소 */
+        h1 { font-size: 1.4rem !important; margin-bottom: 0.4rem !important; padding: 0 !important; }
+        h2 { font-size: 1.1rem !important; margin-top: 0.8rem !important; margin-bottom: 0.4rem !important; }
+        h3 { font-size: 0.95rem !important; margin-bottom: 0.3rem !important; }
+        
+        /* 입력창 디자인 - 바탕 흰색 및 회색 테두리 적용 */
+        div[data-baseweb="input"], [data-baseweb="base-input"], div[data-baseweb="number-input"] { 
+            background-color: #ffffff !important; 
+            border: 1px solid #ddd !important; 
+            border-radius: 4px !important;
+            box-shadow: none !important;
+            min-height: 26px !important;
+            height: auto !important;
+        }
+        /* 탭 하단 선 제거 */
+        div[data-baseweb="tab-highlight"] { display: none !important; }
+        div[data-baseweb="tab-list"] { border-bottom: none !important; }
+        input[type=number] { 
+            -moz-appearance: textfield; 
+            font-size: 12px !important; 
+            padding: 4px 8px !important;
+        }
+        
+        /* 라벨 관련 스타일 - 겹침 방지 */
+        div[data-testid="stWidgetLabel"] p {
+            font-size: 11.5px !important;
+            margin-bottom: 2px !important;
+            line-height: 1.2 !important;
+        }
+        
+        /* 요소 간격 조절 - 음수 마진 제거 및 최적화 */
+        .stNumberInput { margin-bottom: 2px !important; }
+        .stCheckbox { margin-bottom: 2px !important; }
+        div[data-testid="stVerticalBlock"] > div { border: none !important; gap: 0.2rem !important; }
+        
+        /* 사이드바 여백 축소 */
+        div[data-testid="stSidebar"] div[data-testid="stVerticalBlock"] { gap: 0.1rem !important; }
+        hr { margin: 0.5rem 0 !important; }
+        
+        .sub-title { 
+            background-color: #4A5568; color: white; padding: 2px 8px; border-radius: 4px; 
+            font-weight: bold; margin-top: 3px; margin-bottom: 2px; font-size: 11px; 
+        }
+        .section-title { 
+            color: #2D3748; border-bottom: 1.5px solid #2D3748; padding-bottom: 2px; 
+            margin-top: 8px; margin-bottom: 6px; font-weight: bold; font-size: 14.5px;
+        }
+        .result-container-ok { 
+            background-color: #1976d2; color: white; padding: 8px; border-radius: 6px; 
+            text-align: center; font-size: 16px; font-weight: bold; margin: 8px 0; 
+        }
+        .result-container-ng { 
+            background-color: #d32f2f; color: white; padding: 8px; border-radius: 6px; 
+            text-align: center; font-size: 16px; font-weight: bold; margin: 8px 0; 
+        }
+        
+        /* 메트릭(결과 수치) 크기 축소 */
+        div[data-testid="stMetricValue"] { font-size: 1.4rem !important; font-weight: bold !important; }
+        div[data-testid="stMetricLabel"] { font-size: 0.8rem !important; }
+        
+        /* 탭 스타일 조정 */
+        button[data-baseweb="tab"] { padding: 4px 12px !important; font-size: 12px !important; }
+        
+        /* 테이블 열 너비 및 텍스트 최적화 */
+        div[data-testid="stTable"] table { width: 100% !important; border: 1px solid #ddd !important; }
+        div[data-testid="stTable"] th, div[data-testid="stTable"] td { padding: 4px 6px !important; font-size: 11px !important; border: 1px solid #eee !important; }
+        
+        div[data-testid="stTable"] th:nth-child(1), div[data-testid="stTable"] td:nth-child(1) { display: none !important; }
+        div[data-testid="stTable"] th:nth-child(2), div[data-testid="stTable"] td:nth-child(2) { width: 110px !important; background-color: #fdfdfd; }
+        div[data-testid="stTable"] th:nth-child(4), div[data-testid="stTable"] td:nth-child(4) { width: 95px !important; text-align: right !important; font-weight: bold; }
 
-    @media print {
-        @page { size: A4; margin: 8mm; }
-        .no-print { display: none !important; }
-        .print-only { display: block !important; }
-    }
-    .print-only { display: none; }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+        /* 이미지 중앙 정렬 */
+        [data-testid="stImage"] {
+            display: flex !important;
+            justify-content: center !important;
+        }
+        [data-testid="stImage"] img {
+            margin: 0 auto !important;
+        }
+
+        @media print {
+            @page { size: A4; margin: 8mm; }
+            .no-print { display: none !important; }
+            .print-only { display: block !important; }
+        }
+        .print-only { display: none; }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
 
 # 1. 사이드바 설정
-with st.sidebar:
+with profiler.section("sidebar"), st.sidebar:
     st.header("📍 검토 설정")
-    num_floors = st.number_input("검토 층수(기초 포함)", min_value=1, max_value=10, value=2)
+    num_floors = st.number_input("검토 층수(기초 포함)", min_value=1, max_value=10, value=2, key="sb_num_floors")
+    seq_explorer = st.toggle("시공순서 전수 검토", value=False, help="층별/지붕층 시공 완료의 모든 조합을 한 번에 검토합니다.")
+    grid_mode = st.toggle("전체 베이 검토", value=False, help="X/Y 스팬 격자로 건물 전체 베이의 안전율 분포를 검토합니다.")
+    library_mode = st.toggle("시나리오 라이브러리", value=False, help="입력을 저장/불러오고 저장된 시나리오를 조건별로 조회합니다.")
+    monitor_mode = st.toggle("실시간 수위 감시", value=False, help="간극수압계 계측값으로 현재 시공단계의 FS를 실시간 판정합니다.")
+    reliability_mode = st.toggle("신뢰성 검토 (몬테카를로)", value=False, help="단위중량, 지하수위, 부재 치수의 분포로 시공단계별 파괴확률을 계산합니다.")
     st.divider()
 
     sidebar_tabs = st.tabs(["기본", "단면", "수위"])
     
     with sidebar_tabs[0]:
-        x_dist = st.number_input("X방향 길이 (mm)", value=8200)
-        y_dist = st.number_input("Y방향 길이 (mm)", value=8200)
+        x_dist = st.number_input("X방향 길이 (mm)", value=8200, key="sb_x_dist")
+        y_dist = st.number_input("Y방향 길이 (mm)", value=8200, key="sb_y_dist")
         area = (x_dist * y_dist) / 10**6
 
     with sidebar_tabs[1]:
-        h_soil = st.number_input("흙 높이 (mm)", value=1200)
+        h_soil = st.number_input("흙 높이 (mm)", value=1200, key="sb_h_soil")
         floor_heights = []
         for i in range(num_floors):
             h = st.number_input(
@@ -138,313 +162,611 @@ with st.sidebar:
         fd = st.number_input("기초 두께(mm)", value=900, key="sidebar_fd")
 
     with sidebar_tabs[2]:
-        gl_minus = st.number_input("지하수위(GL-m)", value=2.35)
-        target_fs = st.number_input("목표 안전율", value=1.2)
-        unit_c = st.number_input("콘크리트 중량(kN/m³)", value=24.0)
-
-# 이미지 함수
-def get_font(size):
-    """시스템별 한글 폰트 로드 (저장소 내 직접 업로드 폰트 우선)"""
-    # 1. 만약 유저가 malgunbd.ttf 파일을 직접 업로드했다면 그것을 최우선 사용
-    try:
-        return ImageFont.truetype("malgunbd.ttf", size)
-    except:
-        pass
-
-    system = platform.system()
-    try:
-        if system == "Windows":
-            return ImageFont.truetype("malgunbd.ttf", size)
-        elif system == "Darwin": # macOS
-            return ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", size)
-        else: # Linux (Streamlit Cloud)
-            # 리눅스 시스템 폰트 경로들 탐색
-            paths = [
-                "/usr/share/fonts/truetype/nanum/NanumGothicBold.ttf",
-                "/usr/share/fonts/truetype/nanum/NanumGothic.ttf", 
-                "/usr/share/fonts/nanum/NanumGothicBold.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"
-            ]
-            for path in paths:
-                try: return ImageFont.truetype(path, size)
-                except: continue
-            return ImageFont.load_default()
-    except:
-        return ImageFont.load_default()
-
-def overlay_text(img_path, measurements):
-    try: img = Image.open(img_path).convert("RGB")
-    except Exception: img = Image.new("RGB", (1000, 800), color=(220, 220, 220))
-    draw = ImageDraw.Draw(img)
-    
-    font = get_font(45)
-    
-    for pos, val, is_vertical in measurements:
-        text = f"{val:,}"; tw, th = draw.textbbox((0, 0), text, font=font)[2:4]; padding = 12; x, y = pos
-        if is_vertical:
-            txt_img = Image.new("RGBA", (tw + padding * 2, th + padding * 2), (255, 255, 255, 255))
-            ImageDraw.Draw(txt_img).text((padding, padding), text, fill="black", font=font)
-            rotated = txt_img.rotate(90, expand=True); img.paste(rotated, (x-rotated.width//2, y-rotated.height//2), rotated)
-        else:
-            draw.rectangle([x-tw//2-padding, y-th//2-padding, x+tw//2+padding, y+th//2+padding], fill="white")
-            draw.text((x, y), text, fill="black", font=font, anchor="mm")
-    return img
-
-def draw_dynamic_section(h_soil, floor_heights, fd, gl_minus):
-    # 해상도 고정 및 배율 조정 (지하 2층 기준 높이로 고정)
-    scale = 2
-    img_h = 420 * scale  # 전체 높이 고정 (레이아웃 고정용)
-    img_w = 450 * scale
-    
-    # 층수에 따라 유동적으로 층별 높이 결정 (고정 높이 내에 배치)
-    num_f = len(floor_heights)
-    top_margin = 50 * scale
-    bottom_margin = 100 * scale
-    soil_h_px = 60 * scale
-    foot_h_px = 50 * scale
-    
-    # 가용 높이 계산 후 층별 높이 분배
-    available_h = img_h - top_margin - bottom_margin - soil_h_px - foot_h_px
-    row_h_px = available_h / num_f
-    
-    img = Image.new("RGB", (img_w, img_h), color="white")
-    draw = ImageDraw.Draw(img)
-    
-    try: font_size = 18 if num_f <= 2 else (16 if num_f <= 4 else 14)
-    except: font_size = 15
-    font = get_font(font_size * scale)
-    
-    gl_y = top_margin
-    draw.line([(30 * scale, gl_y), (320 * scale, gl_y)], fill="black", width=2 * scale)
-    draw.text((325 * scale, gl_y), "GL", fill="red", font=font, anchor="lm")
-    
-    # Soil (건물 너비를 100 -> 250으로 키움)
-    draw.rectangle([100 * scale, gl_y, 300 * scale, gl_y + soil_h_px], fill="#F0F0F0", outline="black", width=1 * scale)
-    draw.line([(80 * scale, gl_y), (80 * scale, gl_y + soil_h_px)], fill="black", width=1 * scale)
-    draw.text((75 * scale, gl_y + soil_h_px/2), f"{h_soil:,}", fill="black", font=font, anchor="rm")
-    draw.text((200 * scale, gl_y + soil_h_px/2), "흙높이", fill="#666666", font=font, anchor="mm")
-    
-    curr_y = gl_y + soil_h_px
-    # Floors
-    for i, fh in enumerate(floor_heights):
-        draw.rectangle([100 * scale, curr_y, 300 * scale, curr_y + row_h_px], outline="black", width=1 * scale)
-        draw.line([(100 * scale, curr_y), (300 * scale, curr_y)], fill="black", width=3 * scale)
-        draw.line([(80 * scale, curr_y), (80 * scale, curr_y + row_h_px)], fill="black", width=1 * scale)
-        draw.text((75 * scale, curr_y + row_h_px/2), f"{fh:,}", fill="black", font=font, anchor="rm")
-        draw.text((200 * scale, curr_y + row_h_px/2), f"B{i+1}F", fill="#666666", font=font, anchor="mm")
-        curr_y += row_h_px
-        
-    # Footing
-    foot_h = 50 * scale
-    draw.rectangle([50 * scale, curr_y, 350 * scale, curr_y + foot_h], fill="#E0E0E0", outline="black", width=1 * scale)
-    draw.text((200 * scale, curr_y + foot_h/2), f"기초 ({fd:,})", fill="black", font=font, anchor="mm")
-
-    # GWL 위치 계산
-    actual_depth = gl_minus * 1000
-    total_soil_floor_h = h_soil + sum(floor_heights)
-    total_dwg_h = soil_h_px + (len(floor_heights) * row_h_px)
-    
-    gwl_y = gl_y
-    if actual_depth <= h_soil:
-        ratio = actual_depth / h_soil if h_soil > 0 else 0
-        gwl_y = gl_y + (ratio * soil_h_px)
-    else:
-        gwl_y = gl_y + soil_h_px
-        rem = actual_depth - h_soil
-        for fh in floor_heights:
-            if rem <= fh: gwl_y += (rem / fh * row_h_px); rem = 0; break
-            else: gwl_y += row_h_px; rem -= fh
-        if rem > 0: gwl_y += (min(rem / 1000, 1.0) * foot_h)
-
-    # GWL 그리기
-    draw.line([(310 * scale, gwl_y), (340 * scale, gwl_y)], fill="blue", width=1 * scale)
-    tri_h = 10 * scale
-    draw.polygon([(325 * scale, gwl_y), ((325-6)*scale, gwl_y-tri_h), ((325+6)*scale, gwl_y-tri_h)], outline="blue", fill="white")
-    draw.line([(321 * scale, gwl_y + 4 * scale), (329 * scale, gwl_y + 4 * scale)], fill="blue", width=1 * scale)
-    draw.text((345 * scale, gwl_y), f"(GL-{gl_minus})", fill="blue", font=font, anchor="lm")
-        
-    return img
+        gl_minus = st.number_input("지하수위(GL-m)", value=2.35, key="sb_gl_minus")
+        target_fs = st.number_input("목표 안전율", value=1.2, key="sb_target_fs")
+        gwl_solver = st.toggle("임계 수위 산정", value=False, help="시공단계별로 목표 안전율을 만족하는 최고 지하수위를 계산합니다.")
+        unit_c = st.number_input("콘크리트 중량(kN/m³)", value=24.0, key="sb_unit_c")
+        unit_topping = st.number_input("토핑 중량(kN/m³)", value=18.0, key="sb_unit_topping")
+        unit_plain = st.number_input("무근 콘크리트 중량(kN/m³)", value=23.0, key="sb_unit_plain")
 
 # 메인 타이틀
 st.title("🏗️ 시공단계 부력 검토")
 
-c_img1, c_img2 = st.columns([1, 1], gap="large")
-with c_img1:
-    st.markdown("<h3 style='text-align:center; color:#1e3a8a; border-bottom:none; margin-bottom:0px;'>[평면 정보]</h3>", unsafe_allow_html=True)
-    st.image(overlay_text("plan.png", [((550, 30), x_dist, False), ((30, 500), y_dist, True)]), use_container_width=True)
-with c_img2:
-    st.markdown("<h3 style='text-align:center; color:#1e3a8a; border-bottom:none; margin-bottom:0px;'>[층고 정보]</h3>", unsafe_allow_html=True)
-    st.image(draw_dynamic_section(h_soil, floor_heights, fd, gl_minus), use_container_width=True)
-
-st.info("💡 각 지하층 탭에서 시공 완료 여부(체크박스)를 선택하여 단계별 검토가 가능합니다.")
-
 # ---------------------------------------------------------
-# 1. 설계하중 설정
+# 부분 재실행 구성
+# 부재/하중 입력은 각각 fragment로 분리하고, 입력 변경 시 on_change 콜백으로
+# "calc" fragment(하중 표기, 검토 결과, 계산 근거)만 다시 실행한다.
+# 사이드바 변경은 도면과 탭 구성이 바뀌므로 전체 재실행된다.
 # ---------------------------------------------------------
-st.markdown("<h2 class='section-title'>1. 설계하중(고정하중) 설정</h2>", unsafe_allow_html=True)
-ld_c1, ld_c2, ld_c3 = st.columns(3)
-with ld_c1:
-    with st.container(border=True):
-        st.markdown("**지붕층 (Roof)**")
-        t_topping = st.number_input("Topping (mm)", value=1100, key="ld_t_top")
-        t_plain_r = st.number_input("무근 Con'c (mm)", value=100, key="ld_t_pr_r")
-        t_slab_r = st.number_input("슬래브 두께 (mm)", value=250, key="ld_t_slab_r")
-        l_cl_r = st.number_input("Ceiling (kN/㎡)", value=0.3, key="ld_l_cl_r")
-        roof_load = (18 * t_topping / 1000) + (23 * t_plain_r / 1000) + (unit_c * t_slab_r / 1000) + l_cl_r
-        st.caption(f"로드: {roof_load:.2f} kN/㎡")
-with ld_c2:
-    with st.container(border=True):
-        st.markdown("**지하층 일반 (B1F)**")
-        t_slab_mid = st.number_input("슬래브 두께 (mm)", value=150, key="ld_t_slab_mid")
-        l_cl_f = st.number_input("Ceiling (kN/㎡)", value=0.3, key="ld_l_cl_f")
-        floor_load_mid = (unit_c * t_slab_mid / 1000) + l_cl_f
-        st.caption(f"로드: {floor_load_mid:.2f} kN/㎡")
-with ld_c3:
-    with st.container(border=True):
-        st.markdown("**최하층 (Bottom)**")
-        t_plain_bot = st.number_input("무근 Con'c (mm)", value=100, key="ld_t_plain_bot")
-        t_slab_bot = st.number_input("슬래브 두께 (mm)", value=400, key="ld_t_slab_bot")
-        floor_load_bot = (23 * t_plain_bot / 1000) + (unit_c * t_slab_bot / 1000)
-        st.caption(f"로드: {floor_load_bot:.2f} kN/㎡")
+SIDEBAR_KEYS = {
+    "x_dist": "sb_x_dist", "y_dist": "sb_y_dist", "h_soil": "sb_h_soil", "fd": "sidebar_fd",
+    "gl_minus": "sb_gl_minus", "target_fs": "sb_target_fs",
+    "unit_c": "sb_unit_c", "unit_topping": "sb_unit_topping", "unit_plain": "sb_unit_plain",
+}
+LOAD_KEYS = {
+    "t_topping": "ld_t_top", "t_plain_r": "ld_t_pr_r", "t_slab_r": "ld_t_slab_r", "l_cl_r": "ld_l_cl_r",
+    "t_slab_mid": "ld_t_slab_mid", "l_cl_f": "ld_l_cl_f", "t_plain_bot": "ld_t_plain_bot", "t_slab_bot": "ld_t_slab_bot",
+}
+MEMBER_KEYS = {
+    "roof_done": "is_roof_done_chk",
+    "bw_rb1": "brb1", "bh_rb1": "hrb1", "bw_rg1": "brg1", "bh_rg1": "hrg1", "bw_rg2": "brg2", "bh_rg2": "hrg2",
+    "fw": "ft_w", "flv": "ft_l",
+}
+FLOOR_KEYS = {
+    "done": "f_done_{i}", "bw_b1": "bb1_{i}", "bh_b1": "hb1_{i}", "bw_g1": "bg1_{i}", "bh_g1": "hg1_{i}",
+    "bw_g2": "bg2_{i}", "bh_g2": "hg2_{i}", "bw_c": "bc_{i}", "bh_c": "hc_{i}",
+}
 
-# ---------------------------------------------------------
-# 2. 부재정보 및 시공단계 설정
-# ---------------------------------------------------------
-st.markdown("<h2 class='section-title'>2. 부재정보 및 시공단계 설정</h2>", unsafe_allow_html=True)
+def rerun_calc():
+    st.rerun("calc")
+
+def collect_inputs():
+    """사이드바 값과 세션 상태의 위젯 값으로 계산 입력 구성"""
+    calc_inputs = {
+        "x_dist": x_dist, "y_dist": y_dist, "h_soil": h_soil, "fd": fd,
+        "gl_minus": gl_minus, "target_fs": target_fs, "unit_c": unit_c, "h": floor_heights,
+        "unit_topping": unit_topping, "unit_plain": unit_plain,
+    }
+    for name, key in {**LOAD_KEYS, **MEMBER_KEYS}.items():
+        calc_inputs[name] = st.session_state[key]
+    for name, key in FLOOR_KEYS.items():
+        calc_inputs[name] = [st.session_state[key.format(i=i)] for i in range(num_floors)]
+    return calc_inputs
 
-tab_names = ["지붕층 (Roof)"] + [f"지하 {i+1}층 (B{i+1}F)" for i in range(num_floors)] + ["기초 (Footing)"]
-tabs = st.tabs(tab_names)
+@st.fragment
+def drawings():
+    c_img1, c_img2 = st.columns([1, 1], gap="large")
+    with c_img1:
+        st.markdown("<h3 style='text-align:center; color:#1e3a8a; border-bottom:none; margin-bottom:0px;'>[평면 정보]</h3>", unsafe_allow_html=True)
+        measurements = (((550, 30), x_dist, False), ((30, 500), y_dist, True))
+        plan = cached("plan_svg", input_key("plan.png", measurements), lambda: plan_svg("plan.png", measurements))
+        profiler.add("image_bytes", len(plan))
+        st.html(plan)
+    with c_img2:
+        st.markdown("<h3 style='text-align:center; color:#1e3a8a; border-bottom:none; margin-bottom:0px;'>[층고 정보]</h3>", unsafe_allow_html=True)
+        section_args = (h_soil, tuple(floor_heights), fd, gl_minus)
+        section = cached("section_svg", input_key(*section_args), lambda: section_svg(*section_args))
+        profiler.add("image_bytes", len(section))
+        st.html(section)
+
+@st.fragment
+def load_definition():
+    ld_c1, ld_c2, ld_c3 = st.columns(3)
+    with ld_c1:
+        with st.container(border=True):
+            st.markdown("**지붕층 (Roof)**")
+            st.number_input("Topping (mm)", value=1100, key="ld_t_top", on_change=rerun_calc)
+            st.number_input("무근 Con'c (mm)", value=100, key="ld_t_pr_r", on_change=rerun_calc)
+            st.number_input("슬래브 두께 (mm)", value=250, key="ld_t_slab_r", on_change=rerun_calc)
+            st.number_input("Ceiling (kN/㎡)", value=0.3, key="ld_l_cl_r", on_change=rerun_calc)
+            calc_view("roof_load")
+    with ld_c2:
+        with st.container(border=True):
+            st.markdown("**지하층 일반 (B1F)**")
+            st.number_input("슬래브 두께 (mm)", value=150, key="ld_t_slab_mid", on_change=rerun_calc)
+            st.number_input("Ceiling (kN/㎡)", value=0.3, key="ld_l_cl_f", on_change=rerun_calc)
+            calc_view("floor_load_mid")
+    with ld_c3:
+        with st.container(border=True):
+            st.markdown("**최하층 (Bottom)**")
+            st.number_input("무근 Con'c (mm)", value=100, key="ld_t_plain_bot", on_change=rerun_calc)
+            st.number_input("슬래브 두께 (mm)", value=400, key="ld_t_slab_bot", on_change=rerun_calc)
+            calc_view("floor_load_bot")
 
-with tabs[0]:
-    is_roof_done = st.checkbox("지붕층 시공 완료", value=True, key="is_roof_done_chk")
+@st.fragment
+def roof_tab():
+    st.checkbox("지붕층 시공 완료", value=True, key="is_roof_done_chk", on_change=rerun_calc)
     bc1, bc2, bc3 = st.columns(3)
     with bc1: 
         with st.container(border=True):
             st.markdown("**B1**")
             w1, h1 = st.columns(2)
-            bw_rb1 = w1.number_input("폭", 500, key="brb1"); bh_rb1 = h1.number_input("높이", 900, key="hrb1")
+            w1.number_input("폭", 500, key="brb1", on_change=rerun_calc); h1.number_input("높이", 900, key="hrb1", on_change=rerun_calc)
     with bc2: 
         with st.container(border=True):
             st.markdown("**G1**")
             w2, h2 = st.columns(2)
-            bw_rg1 = w2.number_input("폭", 500, key="brg1"); bh_rg1 = h2.number_input("높이", 900, key="hrg1")
+            w2.number_input("폭", 500, key="brg1", on_change=rerun_calc); h2.number_input("높이", 900, key="hrg1", on_change=rerun_calc)
     with bc3: 
         with st.container(border=True):
             st.markdown("**G2**")
             w3, h3 = st.columns(2)
-            bw_rg2 = w3.number_input("폭", 700, key="brg2"); bh_rg2 = h3.number_input("높이", 900, key="hrg2")
-
-floor_inputs = []
-for i in range(num_floors):
-    with tabs[i+1]:
-        is_f_done = st.checkbox(f"지하 {i+1}층 시공 완료", value=True, key=f"f_done_{i}")
-        curr_tf, curr_fl, curr_tp, curr_lc = (t_slab_mid, floor_load_mid, 0, l_cl_f) if i < num_floors-1 else (t_slab_bot, floor_load_bot, t_plain_bot, 0)
-        fc1, fc2 = st.columns([2.5, 0.7])
-        with fc1:
-            fbc1, fbc2, fbc3 = st.columns(3)
-            with fbc1: 
-                with st.container(border=True):
-                    st.markdown("**B1**")
-                    w_b, h_b = st.columns(2)
-                    bw_b1 = w_b.number_input("폭", 400, key=f"bb1_{i}"); bh_b1 = h_b.number_input("높이", 600, key=f"hb1_{i}")
-            with fbc2:
-                with st.container(border=True):
-                    st.markdown("**G1**")
-                    w_g1, h_g1 = st.columns(2)
-                    bw_g1 = w_g1.number_input("폭", 400, key=f"bg1_{i}"); bh_g1 = h_g1.number_input("높이", 600, key=f"hg1_{i}")
-            with fbc3:
-                with st.container(border=True):
-                    st.markdown("**G2**")
-                    w_g2, h_g2 = st.columns(2)
-                    bw_g2 = w_g2.number_input("폭", 500, key=f"bg2_{i}"); bh_g2 = h_g2.number_input("높이", 600, key=f"hg2_{i}")
-        with fc2:
+            w3.number_input("폭", 700, key="brg2", on_change=rerun_calc); h3.number_input("높이", 900, key="hrg2", on_change=rerun_calc)
+
+@st.fragment
+def floor_tab(i):
+    st.checkbox(f"지하 {i+1}층 시공 완료", value=True, key=f"f_done_{i}", on_change=rerun_calc)
+    fc1, fc2 = st.columns([2.5, 0.7])
+    with fc1:
+        fbc1, fbc2, fbc3 = st.columns(3)
+        with fbc1: 
+            with st.container(border=True):
+                st.markdown("**B1**")
+                w_b, h_b = st.columns(2)
+                w_b.number_input("폭", 400, key=f"bb1_{i}", on_change=rerun_calc); h_b.number_input("높이", 600, key=f"hb1_{i}", on_change=rerun_calc)
+        with fbc2:
+            with st.container(border=True):
+                st.markdown("**G1**")
+                w_g1, h_g1 = st.columns(2)
+                w_g1.number_input("폭", 400, key=f"bg1_{i}", on_change=rerun_calc); h_g1.number_input("높이", 600, key=f"hg1_{i}", on_change=rerun_calc)
+        with fbc3:
             with st.container(border=True):
-                st.markdown("**기둥**")
-                w_c, h_c = st.columns(2)
-                bw_c = w_c.number_input("가로", 500, key=f"bc_{i}"); bh_c = h_c.number_input("세로", 700, key=f"hc_{i}")
-        floor_inputs.append({"tf": curr_tf, "fl": curr_fl, "tp": curr_tp, "lc": curr_lc, "bw_b1": bw_b1, "bh_b1": bh_b1, "bw_g1": bw_g1, "bh_g1": bh_g1, "bw_g2": bw_g2, "bh_g2": bh_g2, "bw_c": bw_c, "bh_c": bh_c, "done": is_f_done})
+                st.markdown("**G2**")
+                w_g2, h_g2 = st.columns(2)
+                w_g2.number_input("폭", 500, key=f"bg2_{i}", on_change=rerun_calc); h_g2.number_input("높이", 600, key=f"hg2_{i}", on_change=rerun_calc)
+    with fc2:
+        with st.container(border=True):
+            st.markdown("**기둥**")
+            w_c, h_c = st.columns(2)
+            w_c.number_input("가로", 500, key=f"bc_{i}", on_change=rerun_calc); h_c.number_input("세로", 700, key=f"hc_{i}", on_change=rerun_calc)
 
-with tabs[-1]:
+@st.fragment
+def footing_tab():
     st.info("기초는 시공 완료를 가정합니다.")
     ftc1, ftc2 = st.columns(2)
-    fw = ftc1.number_input("기초 가로(mm)", 3000, key="ft_w"); flv = ftc2.number_input("기초 세로(mm)", 3000, key="ft_l")
+    ftc1.number_input("기초 가로(mm)", 3000, key="ft_w", on_change=rerun_calc); ftc2.number_input("기초 세로(mm)", 3000, key="ft_l", on_change=rerun_calc)
     st.caption(f"기초 두께: {fd} mm (사이드바에서 수정 가능)")
 
+@st.fragment(key="calc")
+def calc_view(part):
+    """입력에 의존하는 표시부, 여러 위치에서 호출되며 입력 변경 시 함께 재실행된다"""
+    ss = st.session_state
+    if not profiler.running: profiler.begin("fragment")
+    if part == "profile":
+        profile_panel(profiler.end()); return
+    with profiler.section(f"calc:{part}"):
+        if part == "roof_load":
+            st.caption(f"로드: {roof_load(unit_c, ss.ld_t_top, ss.ld_t_pr_r, ss.ld_t_slab_r, ss.ld_l_cl_r, unit_topping, unit_plain):.2f} kN/㎡")
+        elif part == "floor_load_mid":
+            st.caption(f"로드: {floor_load_mid(unit_c, ss.ld_t_slab_mid, ss.ld_l_cl_f):.2f} kN/㎡")
+        elif part == "floor_load_bot":
+            st.caption(f"로드: {floor_load_bot(unit_c, ss.ld_t_plain_bot, ss.ld_t_slab_bot, unit_plain):.2f} kN/㎡")
+        elif part == "results":
+            results_panel(collect_inputs())
+        elif part == "report":
+            report_panel(collect_inputs())
+        elif part == "grid":
+            grid_panel(collect_inputs())
+
+def profile_panel(record):
+    """구간별 측정 결과 (프로파일링을 켠 경우에만 표시)"""
+    if record is None: return
+    with st.expander("⏱️ 성능 측정", expanded=False):
+        pf1, pf2, pf3 = st.columns(3)
+        pf1.metric(f"실행 시간 ({record['kind']})", f"{record['total_ms']:,.1f} ms")
+        if record["peak_mb"] is None: pf2.metric("최대 메모리", "-", help="서버에서 BUOYANCY_PROFILE=1로 실행한 경우에만 측정")
+        else: pf2.metric("최대 메모리", f"{record['peak_mb']:,.1f} MB")
+        pf3.metric("전송 이미지", f"{record.get('image_bytes', 0) / 1024:,.1f} KB")
+        st.table(pd.DataFrame(list(record["sections_ms"].items()), columns=["구간", "시간(ms)"]).round(2))
+        cache = result_cache.stats()
+        st.caption(f"공유 캐시: 이번 실행 적중 {record.get('cache_hits', 0)}회, 계산 {record.get('cache_misses', 0)}회 · "
+                   f"전체 {cache['entries']}개 항목, {cache['bytes'] / 1024:,.1f} KB (디스크 적중 {cache['disk_hits']}회)")
+        history = pd.DataFrame([[r["timestamp"], r["kind"], r["total_ms"], r["peak_mb"]] for r in profiler.history],
+                               columns=["시각", "구분", "시간(ms)", "메모리(MB)"])
+        st.dataframe(history.round(2), hide_index=True, use_container_width=True)
+
+def cached(kind, key, func):
+    """세션 간 공유 캐시 조회 (적중/계산 횟수는 프로파일러에 기록)"""
+    value, hit = result_cache.get_or_compute(kind, key, func)
+    profiler.add("cache_hits" if hit else "cache_misses", 1)
+    return value
+
+def bay_graph(calc_inputs):
+    """세션별 계산 그래프, 바뀐 입력의 하위 부재 하중만 다시 계산"""
+    graph = st.session_state.get("calc_graph")
+    if graph is None or graph.num_floors != num_floors:
+        graph = st.session_state["calc_graph"] = build_graph(num_floors)
+    graph.update(flat_inputs(calc_inputs))
+    return graph
+
+def results_panel(calc_inputs):
+    def compute():
+        graph = bay_graph(calc_inputs)
+        return graph["total_w"], graph["u_total"], graph["fs"]
+    total_w, u_total, fs_val = cached("result", calc_key(calc_inputs), compute)
+
+    res1, res2, res3 = st.columns(3)
+    res1.metric("총 하중 (ΣW)", f"{total_w:,.2f} kN")
+    res2.metric("총 부력 (ΣU)", f"{u_total:,.2f} kN")
+    res3.metric("안전율 (FS)", f"{fs_val:.4f}")
+
+    if fs_val >= target_fs:
+        st.markdown(f"<div class='result-container-ok'>판정 : OK ({fs_val:.4f} ≥ {target_fs})</div>", unsafe_allow_html=True)
+    else:
+        st.markdown(f"<div class='result-container-ng'>판정 : NG ({fs_val:.4f} < {target_fs})</div>", unsafe_allow_html=True)
+        st.error("⚠️ 부력 대책 수립이 필요합니다.")
+        countermeasure_panel(calc_inputs)
+
+    if gwl_solver:
+        st.markdown("**시공단계별 임계 지하수위**")
+        stages = construction_stages(num_floors)
+        staged_inputs = with_stages(calc_inputs, stages)
+        gl_crit = critical_gwl(staged_inputs)
+        ht_total = (h_soil + sum(floor_heights)) / 1000
+        gl_grid = np.linspace(0, ht_total, 201)
+        curves = fs_curve(staged_inputs, gl_grid)
+
+        gc1, gc2 = st.columns([1, 1.6])
+        with gc1:
+            crit_rows = [[name, f"GL-{g:.3f}", "OK" if g <= gl_minus else "NG"] for name, g in zip(stages.names, gl_crit)]
+            crit_rows.append(["현재 입력", f"GL-{float(critical_gwl(calc_inputs)):.3f}", "OK" if fs_val >= target_fs else "NG"])
+            st.table(pd.DataFrame(crit_rows, columns=["시공단계", "임계 수위", f"GL-{gl_minus} 판정"]))
+            st.caption("임계 수위보다 지하수위가 높아지면(GL-m 값이 작아지면) 목표 안전율을 만족하지 못합니다.")
+        with gc2:
+            curve_df = pd.DataFrame(curves.T, index=pd.Index(gl_grid, name="지하수위(GL-m)"), columns=stages.names)
+            curve_df["목표 안전율"] = target_fs
+            st.line_chart(curve_df, x_label="지하수위(GL-m)", y_label="FS")
+
+    if seq_explorer:
+        st.markdown("**시공 완료 조합 전수 검토**")
+        methods = st.multiselect("허용 시공 방식", list(SEQUENCE_METHODS), default=list(SEQUENCE_METHODS),
+                                 format_func=SEQUENCE_METHODS.get, key="seq_methods",
+                                 help="최소 위험 타설 순서는 선택한 방식으로 시공 가능한 순서 중에서만 찾습니다.")
+        if not methods:
+            st.warning("시공 방식을 하나 이상 선택하세요."); methods = list(SEQUENCE_METHODS)
+        seq = explore_sequences(calc_inputs, allowed=buildable_states(num_floors, methods))
+        sq1, sq2, sq3 = st.columns(3)
+        sq1.metric("검토 조합 수", f"{seq.fs.size:,}")
+        sq2.metric("NG 조합 수", f"{int(seq.unsafe.sum()):,}")
+        sq3.metric("최소 FS", f"{seq.fs.min():.4f}")
+        st.markdown(f"최소 위험 타설 순서 : 기초 → {' → '.join(seq.order)}")
+        path_rows = [["기초", f"{seq.path_fs[0]:.4f}"]] + [[name, f"{fs:.4f}"] for name, fs in zip(seq.order, seq.path_fs[1:])]
+        st.table(pd.DataFrame(path_rows, columns=["완료 부재", "FS"]))
+        state_df = pd.DataFrame(seq.bits, columns=seq.names).replace({True: "●", False: ""})
+        state_df["ΣW(kN)"] = seq.total_w.round(2); state_df["FS"] = seq.fs.round(4)
+        state_df["판정"] = np.where(seq.unsafe, "NG", "OK")
+        with st.expander("조합별 결과", expanded=False):
+            st.dataframe(state_df.sort_values("FS"), hide_index=True, use_container_width=True)
+
+    if reliability_mode:
+        reliability_panel(calc_inputs)
+
+def countermeasure_panel(calc_inputs):
+    """모든 시공단계의 목표 안전율을 만족하는 최소 공사비 부력 대책"""
+    with st.expander("🛠️ 부력 대책 검토 (최소 공사비)", expanded=True):
+        cc1, cc2, cc3, cc4 = st.columns(4)
+        costs = {
+            "ballast": cc1.number_input("무근 단가 (만원/m³)", value=DEFAULT_COSTS["ballast"], min_value=0.0, key="cm_ballast"),
+            "topping": cc2.number_input("토핑 단가 (만원/m³)", value=DEFAULT_COSTS["topping"], min_value=0.0, key="cm_topping"),
+            "dewatering": cc3.number_input("배수 단가 (만원/m)", value=DEFAULT_COSTS["dewatering"], min_value=0.0, key="cm_dewatering"),
+        }
+        max_anchors = cc4.number_input("최대 앵커 수", value=20, min_value=0, step=1, key="cm_max_anchors")
+        anchor_df = pd.DataFrame({"용량(kN)": list(DEFAULT_COSTS["anchors"]), "단가(만원/개)": list(DEFAULT_COSTS["anchors"].values())})
+        anchor_df = st.data_editor(anchor_df, key="cm_anchors", num_rows="dynamic", hide_index=True, use_container_width=True)
+        anchor_df = anchor_df.dropna()
+        costs["anchors"] = {float(c): float(p) for c, p in zip(anchor_df["용량(kN)"], anchor_df["단가(만원/개)"]) if c > 0}
+        if not costs["anchors"]:
+            st.warning("앵커 규격을 한 개 이상 입력하세요."); return
+
+        opt = optimize_countermeasures(calc_inputs, costs, max_anchors=int(max_anchors))
+        rows = []
+        for design in [opt.best, *opt.by_measure.values()]:
+            if design is None: continue
+            rows.append([design.label, describe(design), f"{design.cost:,.0f}", f"{design.fs.min():.4f}"])
+        missing = [MEASURES[key] for key, design in opt.by_measure.items() if design is None]
+        st.table(pd.DataFrame(rows, columns=["구분", "대책", "공사비(만원)", "최소 FS (전 시공단계)"]))
+        if opt.best is None:
+            st.warning("검토 범위 안에서 목표 안전율을 만족하는 대책이 없습니다. 최대 앵커 수나 앵커 규격을 늘려 보세요.")
+        else:
+            fs_df = pd.DataFrame({"시공단계": opt.stages, "대책 전 FS": opt.fs_before.round(4), "대책 후 FS": opt.best.fs.round(4)})
+            st.dataframe(fs_df, hide_index=True, use_container_width=True)
+        st.caption(f"후보 {opt.evaluated:,}개 검토" + (f" · 단독으로 목표 안전율을 만족할 수 없는 대책: {', '.join(missing)}" if missing else ""))
+
+VAR_LABELS = {"unit_c": "콘크리트 중량", "unit_topping": "토핑 중량", "unit_plain": "무근 중량", "gl_minus": "지하수위"}
+
+@st.cache_data(max_entries=16, show_spinner="몬테카를로 해석 중...")
+def reliability(calc_inputs, n_samples, gl_sd, unit_cov, size_sd):
+    dists = default_distributions(calc_inputs, gl_sd, unit_cov / 100, size_sd)
+    return monte_carlo(calc_inputs, dists, n_samples, seed=0)
+
+def reliability_panel(calc_inputs):
+    """시공단계별 파괴확률과 민감도 (같은 입력은 캐시된 결과 사용)"""
+    st.markdown("**시공단계별 파괴확률 (몬테카를로)**")
+    rc1, rc2, rc3, rc4 = st.columns(4)
+    n_samples = rc1.selectbox("표본 수", [100_000, 1_000_000, 2_000_000], index=1, format_func=lambda n: f"{n:,}", key="mc_samples")
+    gl_sd = rc2.number_input("지하수위 표준편차 (m)", value=0.5, min_value=0.0, step=0.1, key="mc_gl_sd")
+    unit_cov = rc3.number_input("단위중량 변동계수 (%)", value=4.0, min_value=0.0, step=0.5, key="mc_unit_cov")
+    size_sd = rc4.number_input("부재 치수 표준편차 (mm)", value=5.0, min_value=0.0, step=1.0, key="mc_size_sd")
+    rel = reliability(calc_inputs, n_samples, gl_sd, unit_cov, size_sd)
+
+    def top_factors(k):
+        return ", ".join(f"{VAR_LABELS.get(name, name)}({corr:+.2f})" for name, corr in ranking(rel, k, 3))
+    rel_df = pd.DataFrame({
+        "시공단계": rel.stages, "FS 평균": rel.fs_mean.round(4), "FS 표준편차": rel.fs_std.round(4),
+        f"P(FS<{target_fs})": [f"{p:.2e}" for p in rel.p_fail], "신뢰도 지수 β": rel.beta.round(2),
+        "주요 민감 인자 (상관계수)": [top_factors(k) for k in range(len(rel.stages))],
+    })
+    st.table(rel_df)
+    st.caption(f"표본 {rel.samples:,}개 기준이며 파괴확률의 표준오차는 최대 {rel.p_fail_se.max():.1e} 입니다. 상관계수가 음수이면 해당 입력이 커질수록 FS가 작아집니다.")
+    with st.expander("입력별 민감도 전체", expanded=False):
+        sens_df = pd.DataFrame(rel.sensitivity.T.round(3), index=[VAR_LABELS.get(v, v) for v in rel.variables], columns=rel.stages)
+        st.dataframe(sens_df, use_container_width=True)
+
+GRID_OVERRIDES = {"gl_minus": "지하수위(GL-m)", "fw": "기초 가로(mm)", "flv": "기초 세로(mm)"}
+
+def parse_spans(text):
+    spans = [float(v) for v in text.replace(" ", "").split(",") if v]
+    if not spans or min(spans) <= 0: raise ValueError
+    return spans
+
+def grid_panel(calc_inputs):
+    """베이 격자 전체 검토, 변경된 베이만 다시 계산"""
+    gp1, gp2 = st.columns(2)
+    x_text = gp1.text_input("X방향 스팬 목록 (mm, 쉼표 구분)", ", ".join([str(x_dist)] * 4), key="grid_x")
+    y_text = gp2.text_input("Y방향 스팬 목록 (mm, 쉼표 구분)", ", ".join([str(y_dist)] * 3), key="grid_y")
+    try:
+        x_spans, y_spans = parse_spans(x_text), parse_spans(y_text)
+    except ValueError:
+        st.error("스팬은 0보다 큰 숫자를 쉼표로 구분하여 입력하세요."); return
+
+    grid = st.session_state.get("bay_grid")
+    if grid is None or grid.num_floors != num_floors or grid.x_spans.tolist() != x_spans or grid.y_spans.tolist() != y_spans:
+        grid = st.session_state["bay_grid"] = BayGrid(x_spans, y_spans, calc_inputs)
+    all_bays = np.arange(grid.size)
+    shared = {name: calc_inputs[name] for name in grid.data if name not in GRID_OVERRIDES and name not in ("x_dist", "y_dist")}
+    grid.update(all_bays, **shared)
+
+    bay_df = pd.DataFrame({"베이": [f"X{c+1}-Y{r+1}" for r, c in zip(grid.rows, grid.cols)]})
+    for name, label in GRID_OVERRIDES.items(): bay_df[label] = float(calc_inputs[name])
+    with st.expander("베이별 입력 (지하수위, 기초 크기)", expanded=False):
+        edited = st.data_editor(bay_df, key="grid_bays", disabled=["베이"], hide_index=True, use_container_width=True, height=240)
+    grid.update(all_bays, **{name: edited[label].to_numpy(dtype=float) for name, label in GRID_OVERRIDES.items()})
+
+    _, _, fs_all, ok_all = grid.evaluate()
+    gm1, gm2, gm3 = st.columns(3)
+    gm1.metric("베이 수", f"{grid.size:,}")
+    gm2.metric("NG 베이 수", f"{int((~ok_all).sum()):,}")
+    gm3.metric("최소 FS", f"{fs_all.min():.4f}")
+    st.image(png_bytes(draw_fs_heatmap(grid.x_edges, grid.y_edges, grid.fs_grid(), target_fs)), use_container_width=True)
+    if (~ok_all).any():
+        with st.expander("NG 베이 목록", expanded=False):
+            ng = bay_df.loc[~ok_all, ["베이"]].assign(FS=fs_all[~ok_all].round(4))
+            st.dataframe(ng.sort_values("FS"), hide_index=True, use_container_width=True)
+
+# 화면 갱신(monitor_view)이 이 시간 동안 없으면 (탭 닫기, 새로 고침) 감시 스레드가 스스로 멈춘다
+MONITOR_LEASE_S = 120
+
+@st.cache_resource
+def monitor_ports():
+    """소켓 포트별 감시 스레드 (모든 세션 공유, 같은 포트로 새로 시작하면 이전 감시를 멈춤)"""
+    return {}
+
+def stop_monitor():
+    thread = st.session_state.pop("gw_thread", None)
+    if thread is not None: thread.stop()
+
+def monitor_running():
+    return "gw_thread" in st.session_state and st.session_state["gw_thread"].is_alive()
+
+def toggle_monitor():
+    if monitor_running(): stop_monitor(); return
+    ss = st.session_state
+    param = {"모의 계측": "gw_sensors", "CSV 파일": "gw_csv", "로컬 소켓": "gw_port"}[ss.gw_source]
+    start_monitor(ss.gw_source, ss[param], ss.gw_stage)
+
+def start_monitor(source, param, stage):
+    stop_monitor()
+    calc_inputs = collect_inputs()
+    monitor = st.session_state["gw_monitor"] = GroundwaterMonitor(calc_inputs, stage)
+    st.session_state["gw_config"] = (repr(calc_inputs), stage)
+    if source == "모의 계측": factory = lambda: simulate(int(param), base_gl=gl_minus)
+    elif source == "CSV 파일": factory = lambda: tail_csv(param, from_start=True)
+    else:
+        factory = lambda: socket_readings(port=int(param))
+        previous = monitor_ports().pop(int(param), None)
+        if previous is not None: previous.stop()
+    thread = st.session_state["gw_thread"] = MonitorThread(monitor, factory, lease=MONITOR_LEASE_S)
+    if source == "로컬 소켓": monitor_ports()[int(param)] = thread
+    thread.start()
+
+@st.fragment
+def monitor_controls():
+    """계측 입력원과 시공단계 선택, 감시 시작/정지"""
+    stage_names = construction_stages(num_floors).names
+    mc1, mc2, mc3, mc4 = st.columns([1, 1.4, 1, 1])
+    source = mc1.selectbox("계측 입력", ["모의 계측", "CSV 파일", "로컬 소켓"], key="gw_source")
+    if source == "모의 계측": mc2.number_input("모의 센서 수", value=24, min_value=1, step=1, key="gw_sensors")
+    elif source == "CSV 파일": mc2.text_input("CSV 경로 (sensor,gl_minus[,timestamp])", "piezometers.csv", key="gw_csv")
+    else: mc2.number_input("포트", value=9500, min_value=1024, max_value=65535, step=1, key="gw_port")
+    mc3.selectbox("현재 시공단계", range(len(stage_names)), index=len(stage_names) - 1, format_func=lambda k: stage_names[k], key="gw_stage")
+    mc4.button("⏹️ 감시 정지" if monitor_running() else "▶️ 감시 시작", on_click=toggle_monitor, use_container_width=True)
+
+@st.fragment(run_every=1.0)
+def monitor_view():
+    """1초마다 감시 상태만 다시 그린다 (페이지 전체 재실행 없음)"""
+    monitor = st.session_state.get("gw_monitor")
+    if monitor is None:
+        st.info("감시를 시작하면 계측값이 들어올 때마다 현재 시공단계의 FS를 판정합니다."); return
+    thread = st.session_state.get("gw_thread")
+    if thread is not None:
+        thread.touch()
+        if thread.error is not None: st.error(f"계측 입력 오류: {thread.error}")
+        elif thread.expired: st.warning("화면 갱신이 끊겨 감시가 정지되었습니다. 다시 시작하세요.")
+
+    # 부재 입력이나 시공단계가 바뀌면 감시 기준을 갱신
+    config = (repr(collect_inputs()), st.session_state.get("gw_stage", -1))
+    if st.session_state.get("gw_config") != config:
+        monitor.configure(collect_inputs(), config[1]); st.session_state["gw_config"] = config
+
+    snap = monitor.snapshot(); gov = snap["governing"]
+    gw1, gw2, gw3, gw4 = st.columns(4)
+    gw1.metric("시공단계", snap["stage"])
+    gw2.metric("임계 수위", f"GL-{snap['gl_critical']:.3f}")
+    gw3.metric("최소 FS", f"{gov[2]:.4f}" if gov else "-", gov[0] if gov else None, delta_color="off")
+    gw4.metric("수신 계측", f"{snap['count']:,}건", f"평균 {snap['mean_us']:.1f} µs", delta_color="off")
+    ng = [s for s in snap["sensors"] if s[3] == "NG"]
+    if ng: st.error(f"⚠️ NG 센서 {len(ng)}개: {', '.join(s[0] for s in ng[:10])}{' ...' if len(ng) > 10 else ''}")
+
+    mv1, mv2 = st.columns([1.6, 1])
+    with mv1:
+        if snap["history"]:
+            hist = pd.DataFrame(snap["history"], columns=["time", "지배 수위(GL-m)", "FS"])
+            hist["time"] = pd.to_datetime(hist["time"], unit="s")
+            hist["FS"] = hist["FS"].clip(upper=snap["target_fs"] * 3); hist["목표 안전율"] = snap["target_fs"]
+            st.line_chart(hist.set_index("time")[["FS", "목표 안전율"]], y_label="FS")
+    with mv2:
+        sensor_df = pd.DataFrame([s[:4] for s in snap["sensors"]], columns=["센서", "수위(GL-m)", "FS", "상태"])
+        st.dataframe(sensor_df.round(3), hide_index=True, use_container_width=True, height=300)
+    with st.expander(f"경보 기록 ({len(snap['alerts'])})", expanded=bool(ng)):
+        for alert in snap["alerts"][:50]:
+            st.markdown(f"`{datetime.fromtimestamp(alert.timestamp).strftime('%H:%M:%S')}` {alert.message}")
+
+@st.cache_resource
+def scenario_library():
+    return ScenarioLibrary(os.environ.get("BUOYANCY_LIBRARY_DB", "scenarios.db"))
+
+def load_scenario(scenario_id):
+    """저장된 입력을 위젯 상태에 채운다 (콜백에서 호출, 이어서 전체 재실행)"""
+    ss = st.session_state
+    inputs = scenario_library().load(scenario_id)
+    ss["sb_num_floors"] = len(inputs["h"])
+    for name, key in {**SIDEBAR_KEYS, **LOAD_KEYS, **MEMBER_KEYS}.items(): ss[key] = inputs[name]
+    for i, h in enumerate(inputs["h"]): ss[f"h_{i}"] = h
+    for name, key in FLOOR_KEYS.items():
+        for i, value in enumerate(inputs[name]): ss[key.format(i=i)] = value
+
+def library_panel():
+    """현재 입력 저장, 조건 조회, 불러오기, 두 시나리오 비교"""
+    library = scenario_library()
+    lb1, lb2, lb3 = st.columns(3)
+    project = lb1.text_input("프로젝트", "기본 프로젝트", key="lib_project")
+    bay = lb2.text_input("베이", "X1-Y1", key="lib_bay")
+    name = lb3.text_input("메모", "", key="lib_name")
+    ls1, ls2, _ = st.columns([1, 1, 2])
+    if ls1.button("💾 현재 입력 저장", use_container_width=True):
+        library.save(project, bay, collect_inputs(), name=name); st.toast("현재 입력을 저장했습니다.")
+    if ls2.button("💾 시공단계 전체 저장", use_container_width=True):
+        n = library.save_stages(project, bay, collect_inputs(), name=name); st.toast(f"시공단계 {n}건을 저장했습니다.")
+
+    st.markdown("**저장된 시나리오 조회**")
+    projects = library.projects()
+    if not projects:
+        st.caption("저장된 시나리오가 없습니다."); return
+    lq1, lq2, lq3, lq4 = st.columns(4)
+    q_project = lq1.selectbox("프로젝트", ["(전체)"] + projects, key="lib_q_project")
+    q_ok = lq2.selectbox("판정", ["(전체)", "NG", "OK"], key="lib_q_ok")
+    q_gwl = lq3.number_input("지하수위가 GL-m 보다 높은 경우 (0: 조건 없음)", value=0.0, min_value=0.0, step=0.5, key="lib_q_gwl")
+    q_fs = lq4.number_input("FS 미만 (0: 조건 없음)", value=0.0, min_value=0.0, step=0.1, key="lib_q_fs")
+    filters = {
+        "project": None if q_project == "(전체)" else q_project,
+        "ok": None if q_ok == "(전체)" else q_ok == "OK",
+        "gwl_above": q_gwl or None, "fs_below": q_fs or None,
+    }
+    total = library.count(**filters)
+    rows = list(library.query(limit=500, **filters))
+    row_df = pd.DataFrame(rows, columns=ScenarioRow._fields)
+    row_df["ok"] = np.where(row_df["ok"] == 1, "OK", "NG")
+    row_df["saved"] = pd.to_datetime(row_df["saved"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+    st.caption(f"조건에 맞는 시나리오 {total:,}건" + (" (FS 낮은 순 500건 표시)" if total > 500 else ""))
+    st.dataframe(row_df.round({"fs": 4}), hide_index=True, use_container_width=True, height=260)
+    if not rows: return
+
+    labels = {r.id: f"#{r.id} {r.project} / {r.bay} / {r.stage} (FS {r.fs:.3f})" for r in rows}
+    ll1, ll2, ll3 = st.columns([2, 1, 1])
+    pick = ll1.selectbox("불러올 시나리오", list(labels), format_func=labels.get, key="lib_pick")
+    ll2.button("📂 불러오기", on_click=load_scenario, args=(pick,), use_container_width=True)
+    if ll3.button("🔄 조회 결과 재계산", use_container_width=True, help="저장된 입력으로 현재 계산식 기준 결과를 다시 구합니다."):
+        updated, flipped = library.reevaluate(**filters)
+        st.toast(f"{updated:,}건 재계산, 판정 변경 {flipped:,}건")
+
+    with st.expander("두 시나리오 비교", expanded=False):
+        ld1, ld2 = st.columns(2)
+        id_a = ld1.selectbox("A", list(labels), format_func=labels.get, key="lib_diff_a")
+        id_b = ld2.selectbox("B", list(labels), index=min(1, len(labels) - 1), format_func=labels.get, key="lib_diff_b")
+        diff = library.diff(id_a, id_b)
+        if diff:
+            st.dataframe(pd.DataFrame([[n, str(a), str(b)] for n, a, b in diff], columns=["항목", "A", "B"]), hide_index=True, use_container_width=True)
+        else:
+            st.caption("입력과 결과가 같습니다.")
+
+def report_workbook(calc_inputs):
+    """현재 입력과 시공단계별 시트로 구성된 엑셀 계산서"""
+    stages = construction_stages(num_floors)
+    scenarios = [("현재 입력", calc_inputs)]
+    for k, name in enumerate(stages.names):
+        scenarios.append((f"단계 {k} {name}", {**calc_inputs, "done": list(stages.done[k]), "roof_done": bool(stages.roof_done[k])}))
+    return report_bytes(scenarios)
+
+def report_panel(calc_inputs):
+    rp1, rp2 = st.columns([1, 1])
+    show_report = rp1.button("📊 계산 근거 보기")
+    rp2.download_button(
+        "📥 엑셀 계산서", data=lambda: report_workbook(calc_inputs), file_name=f"부력검토_{datetime.now():%Y%m%d}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", on_click="ignore",
+    )
+    if show_report:
+        calc = cached("details", calc_key(calc_inputs), lambda: calc_details(calc_inputs))
+        st.info("💡 이제 Ctrl + P를 눌러 PDF로 저장하세요.")
+        
+        st.markdown(f"""
+            <div class="print-only">
+                <h1>시공단계 부력 검토 상세 보고서</h1>
+                <p>출력 일시: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <hr>
+            </div>
+        """, unsafe_allow_html=True)
+
+        with st.expander("🏠 지붕층(Roof) 상세 상세", expanded=True):
+            st.table(pd.DataFrame(calc["roof_calc"], columns=["부재명", "상세 산식", "하중(kN)"]))
+        for i, floor_data in enumerate(calc["floor_calcs"]):
+            with st.expander(f"🏢 지하 {i+1}층 상세 상세", expanded=True):
+                st.table(pd.DataFrame(floor_data, columns=["부재명", "상세 산식", "하중(kN)"]))
+        with st.expander("🌊 부력(U) 상세 상세", expanded=True):
+            st.table(pd.DataFrame(calc["u_rows"], columns=["구분", "상세 산식", "결과(kN)"]))
+
+with profiler.section("drawings"):
+    drawings()
+
+st.info("💡 각 지하층 탭에서 시공 완료 여부(체크박스)를 선택하여 단계별 검토가 가능합니다.")
+
 # ---------------------------------------------------------
-# 계산 로직
+# 1. 설계하중 설정
 # ---------------------------------------------------------
-def get_step(w, h, t, l, m): return unit_c * (w/1000) * (h/1000 - t/1000) * l * m, f"{unit_c} x {w/1000} x ({h/1000} - {t/1000}) x {l} x {m}"
-
-total_w = 0; roof_calc = []; floor_calcs = []
-m_r = 1.0 if is_roof_done else 0.0
-w_rs = roof_load * area * m_r
-total_w += w_rs
-roof_calc.append(["지붕층 슬래브", f"({18}*({t_topping/1000}) + {23}*({t_plain_r/1000}) + {unit_c}*({t_slab_r/1000}) + {l_cl_r}) x {area:.2f} x {m_r}", f"{w_rs:,.2f}"])
-v1, e1 = get_step(bw_rb1, bh_rb1, t_slab_r, x_dist/1000, m_r); roof_calc.append(["지붕층 B1", e1, f"{v1:,.2f}"]); total_w += v1
-v2, e2 = get_step(bw_rg1, bh_rg1, t_slab_r, y_dist/1000, m_r); roof_calc.append(["지붕층 G1", e2, f"{v2:,.2f}"]); total_w += v2
-v3, e3 = get_step(bw_rg2, bh_rg2, t_slab_r, x_dist/1000, m_r); roof_calc.append(["지붕층 G2", e3, f"{v3:,.2f}"]); total_w += v3
-
-for i, f in enumerate(floor_inputs):
-    fh = floor_heights[i]/1000; m_f = 1.0 if f["done"] else 0.0; f_rows = []
-    w_c = unit_c * (f["bw_c"]/1000) * (f["bh_c"]/1000) * fh * m_f
-    f_rows.append([f"지하{i+1}층 기둥", f"{unit_c} x {f['bw_c']/1000} x {f['bh_c']/1000} x {fh} x {m_f}", f"{w_c:,.2f}"]); total_w += w_c
-    if i == num_floors-1:
-        fa = (fw*flv)/10**6; w_sn = f["fl"]*(area-fa)*m_f; w_ft = (f["fl"] + unit_c*(fd/1000 - f["tf"]/1000))*fa
-        f_expr = f"({23}*({f['tp']/1000}) + {unit_c}*({f['tf']/1000}))"
-        f_rows.append([f"지하{i+1}층 슬래브", f"{f_expr} x ({area:.2f}-{fa:.2f}) x {m_f}", f"{w_sn:,.2f}"])
-        f_rows.append([f"지하{i+1}층 기초부", f"({f_expr} + {unit_c} x ({fd/1000}-{f['tf']/1000})) x {fa:.2f}", f"{w_ft:,.2f}"])
-        total_w += (w_sn + w_ft)
-    else:
-        ws = f["fl"]*area*m_f; f_expr = f"({unit_c}*({f['tf']/1000}) + {f['lc']})"
-        f_rows.append([f"지하{i+1}층 슬래브", f"{f_expr} x {area:.2f} x {m_f}", f"{ws:,.2f}"]); total_w += ws
-        vb1, eb1 = get_step(f["bw_b1"], f["bh_b1"], f["tf"], x_dist/1000, m_f); f_rows.append([f"지하{i+1}층 B1", eb1, f"{vb1:,.2f}"]); total_w += vb1
-        vg1, eg1 = get_step(f["bw_g1"], f["bh_g1"], f["tf"], y_dist/1000, m_f); f_rows.append([f"지하{i+1}층 G1", eg1, f"{vg1:,.2f}"]); total_w += vg1
-        vg2, eg2 = get_step(f["bw_g2"], f["bh_g2"], f["tf"], x_dist/1000, m_f); f_rows.append([f"지하{i+1}층 G2", eg2, f"{vg2:,.2f}"]); total_w += vg2
-    floor_calcs.append(f_rows)
+st.markdown("<h2 class='section-title'>1. 설계하중(고정하중) 설정</h2>", unsafe_allow_html=True)
+with profiler.section("load_definition"):
+    load_definition()
 
-ht = (h_soil+sum(floor_heights))/1000; wh = ht - gl_minus; fa = (fw*flv)/10**6
-u1 = 10 * (wh + floor_inputs[-1]["tf"]/1000) * (area-fa); u2 = 10 * (wh + fd/1000) * fa
-u_total = u1 + u2; fs_val = total_w / u_total if u_total > 0 else 0
+# ---------------------------------------------------------
+# 2. 부재정보 및 시공단계 설정
+# ---------------------------------------------------------
+st.markdown("<h2 class='section-title'>2. 부재정보 및 시공단계 설정</h2>", unsafe_allow_html=True)
+
+with profiler.section("member_tabs"):
+    tab_names = ["지붕층 (Roof)"] + [f"지하 {i+1}층 (B{i+1}F)" for i in range(num_floors)] + ["기초 (Footing)"]
+    tabs = st.tabs(tab_names)
+
+    with tabs[0]:
+        roof_tab()
+    for i in range(num_floors):
+        with tabs[i+1]:
+            floor_tab(i)
+    with tabs[-1]:
+        footing_tab()
 
 # ---------------------------------------------------------
 # 3. 검토 결과
 # ---------------------------------------------------------
 st.markdown("<h2 class='section-title'>3. 검토 결과</h2>", unsafe_allow_html=True)
-res1, res2, res3 = st.columns(3)
-res1.metric("총 하중 (ΣW)", f"{total_w:,.2f} kN")
-res2.metric("총 부력 (ΣU)", f"{u_total:,.2f} kN")
-res3.metric("안전율 (FS)", f"{fs_val:.4f}")
+calc_view("results")
+
+if grid_mode:
+    st.markdown("<h2 class='section-title'>3-1. 전체 베이 검토</h2>", unsafe_allow_html=True)
+    calc_view("grid")
 
-if fs_val >= target_fs:
-    st.markdown(f"<div class='result-container-ok'>판정 : OK ({fs_val:.4f} ≥ {target_fs})</div>", unsafe_allow_html=True)
+if monitor_mode:
+    st.markdown("<h2 class='section-title'>3-2. 지하수위 실시간 감시</h2>", unsafe_allow_html=True)
+    monitor_controls()
+    monitor_view()
 else:
-    st.markdown(f"<div class='result-container-ng'>판정 : NG ({fs_val:.4f} < {target_fs})</div>", unsafe_allow_html=True)
-    st.error("⚠️ 부력 대책 수립이 필요합니다.")
+    stop_monitor()
+
+if library_mode:
+    st.markdown("<h2 class='section-title'>3-3. 시나리오 라이브러리</h2>", unsafe_allow_html=True)
+    library_panel()
 
 # ---------------------------------------------------------
 # 4. 데이터 보기 및 PDF 출력용 섹션
 # ---------------------------------------------------------
 st.divider()
-if st.button("📊 계산 근거 보기"):
-    st.info("💡 이제 Ctrl + P를 눌러 PDF로 저장하세요.")
-    
-    st.markdown(f"""
-        <div class="print-only">
-            <h1>시공단계 부력 검토 상세 보고서</h1>
-            <p>출력 일시: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            <hr>
-        </div>
-    """, unsafe_allow_html=True)
-
-    with st.expander("🏠 지붕층(Roof) 상세 상세", expanded=True):
-        st.table(pd.DataFrame(roof_calc, columns=["부재명", "상세 산식", "하중(kN)"]))
-    for i, floor_data in enumerate(floor_calcs):
-        with st.expander(f"🏢 지하 {i+1}층 상세 상세", expanded=True):
-            st.table(pd.DataFrame(floor_data, columns=["부재명", "상세 산식", "하중(kN)"]))
-    with st.expander("🌊 부력(U) 상세 상세", expanded=True):
-        u_rows = [
-            ["일반구간 부력 (U1)", f"10 x ({wh:.3f} + {floor_inputs[-1]['tf']/1000}) x ({area:.2f} - {fa:.2f})", f"{u1:,.2f}"],
-            ["기초구간 부력 (U2)", f"10 x ({wh:.3f} + {fd/1000}) x {fa:.2f}", f"{u2:,.2f}"],
-            ["총 부력 합계 (ΣU)", "U1 + U2", f"{u_total:,.2f}"]
-        ]
-        st.table(pd.DataFrame(u_rows, columns=["구분", "상세 산식", "결과(kN)"]))
+calc_view("report")
+calc_view("profile")
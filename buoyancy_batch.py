@@ -0,0 +1,173 @@
+"""부력 검토 일괄 실행 (Streamlit 없이 CSV/Parquet 시나리오 표를 청크 단위로 병렬 계산)
+
+사용 예:
+    python buoyancy_batch.py site_bays.csv -o results.csv --chunksize 5000 --workers 8
+
+입력 표는 한 행이 한 시나리오이며 열 이름은 flat_inputs 규칙을 따른다
+(x_dist, gl_minus, t_topping ..., 층 입력은 h_0, done_0, bw_b1_0 ...).
+num_floors 열이 없으면 --num-floors 값, 그것도 없으면 머리글의 층 입력 열 수를 층수로 쓴다.
+층수를 넘는 층 입력 열에 값이 있으면 오류로 멈추며, 없는 입력 열과 빈 칸은 앱 기본값으로 채운다.
+입력 이외의 열 (프로젝트, 베이, 단계 등)은 결과에 그대로 전달된다.
+"""
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from buoyancy_engine import FIRST_FLOOR_HEIGHT, FLOOR_DEFAULTS, FLOOR_FIELDS, SCALAR_DEFAULTS, SCALAR_FIELDS, evaluate, nested_inputs
+
+RESULT_COLUMNS = ["total_w", "u_total", "fs", "result"]
+FLOOR_COLUMN = re.compile(r"^(%s)_(\d+)$" % "|".join(sorted(FLOOR_FIELDS, key=len, reverse=True)))
+
+
+def input_columns(num_floors):
+    return list(SCALAR_FIELDS) + [f"{name}_{i}" for name in FLOOR_FIELDS for i in range(num_floors)]
+
+
+def is_input_column(name):
+    """계산 입력 열 여부 (층수와 무관하게 {층 입력}_{i} 형식은 모두 입력)"""
+    return name in SCALAR_DEFAULTS or FLOOR_COLUMN.match(str(name)) is not None
+
+
+def header_floors(columns):
+    """머리글의 층 입력 열 ({name}_{i})로 본 층수, 층 입력 열이 없으면 0"""
+    indices = [int(m.group(2)) for m in map(FLOOR_COLUMN.match, map(str, columns)) if m]
+    return max(indices) + 1 if indices else 0
+
+
+def _column(frame, name, default):
+    """입력 열을 float 배열로, 열이 없거나 빈 칸이면 앱 기본값으로 채운다"""
+    if name in frame: return frame[name].astype(float).fillna(float(default)).to_numpy()
+    return np.full(len(frame), float(default))
+
+
+def evaluate_frame(frame, num_floors=None):
+    """시나리오 표를 층수별로 묶어 일괄 계산하고 ΣW, ΣU, FS, 판정 열을 붙인 표 반환
+
+    층수는 num_floors 열, 없으면 num_floors 인자, 그것도 없으면 머리글의 층 입력 열로
+    정한다 (층 입력 열도 없으면 2). 층수를 넘는 층 입력에 값이 있으면 ValueError.
+    """
+    in_header = header_floors(frame.columns)
+    default_floors = num_floors or in_header or 2
+    if "num_floors" in frame: floors_col = frame["num_floors"].fillna(default_floors).to_numpy(dtype=int)
+    else: floors_col = np.full(len(frame), default_floors)
+    out = pd.DataFrame(index=frame.index, columns=RESULT_COLUMNS[:3], dtype=float)
+    for nf in np.unique(floors_col):
+        group = frame[floors_col == nf]
+        extra = [f"{name}_{i}" for name in FLOOR_FIELDS for i in range(nf, in_header) if f"{name}_{i}" in group]
+        filled = group[extra].notna().any(axis=1) if extra else pd.Series(False, index=group.index)
+        if filled.any():
+            row = filled.idxmax(); cols = [c for c in extra if pd.notna(group.at[row, c])]
+            raise ValueError(f"시나리오 {row}: 층수 {nf}보다 많은 층 입력이 있습니다 ({', '.join(cols[:5])})")
+        flat = {name: _column(group, name, SCALAR_DEFAULTS[name]) for name in SCALAR_FIELDS}
+        for name in FLOOR_FIELDS:
+            for i in range(nf):
+                default = FIRST_FLOOR_HEIGHT if (name == "h" and i == 0) else FLOOR_DEFAULTS[name]
+                flat[f"{name}_{i}"] = _column(group, f"{name}_{i}", default)
+        res = evaluate(nested_inputs(flat, nf))
+        out.loc[group.index, "total_w"] = res.total_w
+        out.loc[group.index, "u_total"] = res.u_total
+        out.loc[group.index, "fs"] = res.fs
+    target = _column(frame, "target_fs", SCALAR_DEFAULTS["target_fs"])
+    out["result"] = np.where(out["fs"].to_numpy() >= target, "OK", "NG")
+    return out
+
+
+def _process_chunk(chunk, num_floors, keep_inputs):
+    res = evaluate_frame(chunk, num_floors)
+    if keep_inputs: return pd.concat([chunk, res], axis=1)
+    passthrough = [c for c in chunk.columns if not is_input_column(c)]
+    return pd.concat([chunk[passthrough], res], axis=1)
+
+
+def read_chunks(path, chunksize):
+    """입력 파일을 chunksize 행 단위 DataFrame으로 순차 읽기"""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet 입력에는 pyarrow가 필요합니다 (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class ResultWriter:
+    """결과 청크를 순서대로 파일에 이어 쓰기 (.csv, .parquet 또는 .xlsx)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet = None
+        self._excel = None
+        if path.endswith(".xlsx"):
+            from buoyancy_report import BatchSheetWriter
+            self._excel = BatchSheetWriter(path)
+        self._first = True
+        self.columns = None
+        self.rows = 0
+
+    def write(self, frame):
+        # 모든 청크를 첫 청크의 열 구성으로 맞춘다 (CSV 머리글, Parquet 스키마 유지)
+        if self.columns is None: self.columns = list(frame.columns)
+        else: frame = frame.reindex(columns=self.columns)
+        if self._excel is not None:
+            self._excel.write(frame)
+        elif self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None: self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+        self.rows += len(frame)
+
+    def close(self):
+        if self._parquet is not None: self._parquet.close()
+        if self._excel is not None: self._excel.close()
+
+
+def run_batch(input_path, output_path, chunksize=5000, workers=None, num_floors=None, keep_inputs=False):
+    """청크를 프로세스 풀로 병렬 계산하고 입력 순서대로 결과를 이어 쓴다
+
+    동시에 처리 중인 청크는 workers x 2개로 제한해 메모리 사용량을 일정하게 유지한다.
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = ResultWriter(output_path)
+    pending = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in read_chunks(input_path, chunksize):
+                pending.append(pool.submit(_process_chunk, chunk, num_floors, keep_inputs))
+                if len(pending) >= workers * 2: writer.write(pending.pop(0).result())
+            for future in pending: writer.write(future.result())
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="시공단계 부력 검토 일괄 실행")
+    parser.add_argument("input", help="시나리오 표 (.csv 또는 .parquet)")
+    parser.add_argument("-o", "--output", required=True, help="결과 파일 (.csv, .parquet 또는 .xlsx)")
+    parser.add_argument("--chunksize", type=int, default=5000, help="청크당 행 수 (기본 5000)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본 CPU 코어 수)")
+    parser.add_argument("--num-floors", type=int, default=None,
+                        help="num_floors 열이 없을 때 검토 층수 (기본: 머리글의 층 입력 열 h_0, h_1 ...로 판단, 없으면 2)")
+    parser.add_argument("--keep-inputs", action="store_true", help="결과에 입력 열 전체 포함")
+    args = parser.parse_args(argv)
+    try:
+        rows = run_batch(args.input, args.output, args.chunksize, args.workers, args.num_floors, args.keep_inputs)
+    except ValueError as exc:
+        raise SystemExit(f"입력 오류: {exc}")
+    print(f"{rows:,}개 시나리오 검토 완료 -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""부력 검토 앱 성능 측정 (헤드리스)
+
+사용 예:
+    python buoyancy_bench.py -o bench_results.json
+    python buoyancy_bench.py --only calc render --repeat 3
+
+측정 항목:
+    app     Streamlit AppTest로 전체 스크립트 재실행 시간 (검토 층수 1~10)
+    render  draw_dynamic_section / overlay_text 렌더링 시간, PNG 인코딩 시간과 크기 (캐시 미적용)
+            및 앱 화면용 section_svg / plan_svg 생성 시간과 크기
+    calc    단일 시나리오 반복 계산 대비 NumPy 일괄 계산 처리량 (시나리오/초)
+결과는 버전 간 비교를 위해 JSON으로 저장한다.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from buoyancy_drawing import draw_dynamic_section, overlay_text, plan_svg, section_svg
+from buoyancy_engine import calc_details, calc_trace, default_inputs, evaluate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(HERE, "buoyancy_app.py")
+PLAN_PATH = os.path.join(HERE, "plan.png")
+
+
+def timed(func, repeat):
+    """repeat회 실행 시간 (초) 목록"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); func(); times.append(time.perf_counter() - t0)
+    return times
+
+
+def _record(name, params, times, **extra):
+    return {"name": name, "params": params, "median_s": statistics.median(times), "min_s": min(times), "runs": len(times), **extra}
+
+
+def bench_app(repeat, floors):
+    from streamlit.testing.v1 import AppTest
+    results = []
+    cwd = os.getcwd(); os.chdir(HERE)
+    try:
+        for nf in floors:
+            at = AppTest.from_file(APP_PATH, default_timeout=60)
+            t0 = time.perf_counter(); at.run(); first = time.perf_counter() - t0
+            at.sidebar.number_input[0].set_value(nf)
+            at.run()
+            if at.exception: raise RuntimeError(at.exception[0].message)
+            times = timed(at.run, repeat)
+            results.append(_record("app_rerun", {"num_floors": nf}, times, first_run_s=first, widgets=len(at.number_input)))
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def _png_size(img):
+    buf = io.BytesIO(); img.save(buf, format="PNG")
+    return buf.tell()
+
+
+def bench_render(repeat, floors):
+    results = []
+    # lru_cache 우회 (__wrapped__)로 실제 렌더링 비용 측정
+    draw = draw_dynamic_section.__wrapped__; overlay = overlay_text.__wrapped__
+    for nf in floors:
+        heights = tuple([4050] + [5380] * (nf - 1))
+        img = draw(1200, heights, 900, 2.35)
+        times = timed(lambda: draw(1200, heights, 900, 2.35), repeat)
+        enc = timed(lambda: _png_size(img), repeat)
+        results.append(_record("draw_dynamic_section", {"num_floors": nf}, times, encode_median_s=statistics.median(enc), png_bytes=_png_size(img)))
+        svg = section_svg.__wrapped__
+        times = timed(lambda: svg(1200, heights, 900, 2.35), repeat)
+        results.append(_record("section_svg", {"num_floors": nf}, times, svg_bytes=len(svg(1200, heights, 900, 2.35).encode())))
+    measurements = (((550, 30), 8200, False), ((30, 500), 8200, True))
+    img = overlay(PLAN_PATH, measurements)
+    times = timed(lambda: overlay(PLAN_PATH, measurements), repeat)
+    enc = timed(lambda: _png_size(img), repeat)
+    results.append(_record("overlay_text", {"image": "plan.png"}, times, encode_median_s=statistics.median(enc), png_bytes=_png_size(img)))
+    svg = plan_svg.__wrapped__
+    times = timed(lambda: svg(PLAN_PATH, measurements), repeat)
+    results.append(_record("plan_svg", {"image": "plan.png"}, times, svg_bytes=len(svg(PLAN_PATH, measurements).encode())))
+    return results
+
+
+def bench_calc(repeat, floors, batch_size):
+    results = []
+    rng = np.random.default_rng(0)
+    for nf in floors:
+        base = default_inputs(nf)
+        n_scalar = max(batch_size // 100, 10)
+        scalar_inputs = [dict(base, gl_minus=float(g)) for g in rng.uniform(0, 10, n_scalar)]
+        for name, func in (("scalar_calc_details", calc_details), ("scalar_calc_trace", calc_trace), ("scalar_evaluate", evaluate)):
+            times = timed(lambda: [func(inp) for inp in scalar_inputs], repeat)
+            results.append(_record(name, {"num_floors": nf, "scenarios": n_scalar}, times, scenarios_per_s=n_scalar / statistics.median(times)))
+        batch = dict(base, gl_minus=rng.uniform(0, 10, batch_size), x_dist=rng.uniform(6000, 10000, batch_size))
+        batch["done"] = rng.random((batch_size, nf)) < 0.7
+        times = timed(lambda: evaluate(batch), repeat)
+        results.append(_record("batch_evaluate", {"num_floors": nf, "scenarios": batch_size}, times, scenarios_per_s=batch_size / statistics.median(times)))
+    return results
+
+
+def _versions():
+    meta = {"python": platform.python_version(), "platform": platform.platform(), "numpy": np.__version__,
+            "timestamp": datetime.now().isoformat(timespec="seconds")}
+    for mod in ("streamlit", "PIL", "pandas"):
+        try: meta[mod] = __import__(mod).__version__
+        except Exception: meta[mod] = None
+    try: meta["git_commit"] = subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True).stdout.strip() or None
+    except Exception: meta["git_commit"] = None
+    return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="부력 검토 성능 측정")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="결과 JSON 경로")
+    parser.add_argument("--only", nargs="+", choices=["app", "render", "calc"], default=["app", "render", "calc"])
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 반복 횟수 (중앙값 기록)")
+    parser.add_argument("--floors", type=int, nargs="+", default=list(range(1, 11)), help="검토 층수 목록")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="일괄 계산 시나리오 수")
+    args = parser.parse_args(argv)
+
+    results = []
+    if "calc" in args.only: results += bench_calc(args.repeat, args.floors, args.batch_size)
+    if "render" in args.only: results += bench_render(args.repeat, args.floors)
+    if "app" in args.only: results += bench_app(args.repeat, args.floors)
+    for r in results:
+        rate = f"  {r['scenarios_per_s']:,.0f}/s" if "scenarios_per_s" in r else ""
+        print(f"{r['name']:<22} {json.dumps(r['params'], ensure_ascii=False):<36} {r['median_s'] * 1000:9.2f} ms{rate}", file=sys.stderr)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"meta": _versions(), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""세션 간 공유 결과 캐시 (정규화한 입력의 해시를 키로 사용)
+
+같은 입력이면 어느 세션에서 계산했든 ΣW/ΣU/FS, 계산 근거 표, 도면을 다시 쓴다.
+값은 pickle 바이트로 보관해 크기 기준 LRU로 내보내고, 호출자가 결과를 고쳐도
+캐시가 바뀌지 않는다. 디스크 경로를 주면 SQLite (WAL)에 함께 저장해 재시작 후와
+다른 작업 프로세스에서도 재사용한다. 디스크 저장소는 저장 시각 기준으로 정리해
+max_age_s보다 오래된 항목을 지우고, 전체 크기가 max_disk_bytes를 넘으면 오래된
+항목부터 지운다 (prune_every회 저장마다, 그리고 열 때 한 번).
+
+환경 변수: BUOYANCY_CACHE_DB=<SQLite 경로> (디스크 저장), BUOYANCY_CACHE_MB=<메모리 한도, 기본 64>,
+BUOYANCY_CACHE_DISK_MB=<디스크 한도, 기본 256>, BUOYANCY_CACHE_DAYS=<디스크 보관 기간, 기본 30>
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from buoyancy_engine import FLOOR_FIELDS, SCALAR_FIELDS
+
+# 계산식이나 저장 형식이 바뀌면 올려서 이전 캐시를 무효화
+CACHE_VERSION = 1
+
+
+def canonical(value):
+    """해시용 정규화: 정수/실수 구분 없이 float, 배열/튜플은 리스트, dict는 키 정렬"""
+    if isinstance(value, (bool, np.bool_)): return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)): return float(value)
+    if isinstance(value, dict): return {str(k): canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple, np.ndarray)): return [canonical(v) for v in value]
+    return value
+
+
+def input_key(*parts):
+    text = json.dumps([CACHE_VERSION, canonical(list(parts))], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def calc_key(inputs):
+    """계산 입력 전체 (사이드바, 층별 부재, 지붕층, 기초)의 키, 그 밖의 항목은 무시"""
+    return input_key({name: inputs[name] for name in SCALAR_FIELDS + FLOOR_FIELDS})
+
+
+class ResultCache:
+    """크기 기준 LRU 메모리 캐시 + 선택적 SQLite 저장소 (스레드 안전)"""
+
+    def __init__(self, max_bytes=64 * 2**20, path=None, max_disk_bytes=256 * 2**20, max_age_s=30 * 86400, prune_every=64):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age_s = max_age_s
+        self.prune_every = prune_every
+        self._puts = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path: self.prune()
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS results (kind TEXT, key TEXT, value BLOB, created REAL, PRIMARY KEY (kind, key))")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_results_created ON results (created)")
+        return conn
+
+    def _remember(self, item, blob):
+        with self._lock:
+            old = self._items.pop(item, None)
+            if old is not None: self.bytes -= len(old)
+            if len(blob) > self.max_bytes: return
+            self._items[item] = blob; self.bytes += len(blob)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False); self.bytes -= len(evicted)
+
+    def get(self, kind, key, default=None):
+        item = (kind, key)
+        with self._lock:
+            blob = self._items.get(item)
+            if blob is not None:
+                self._items.move_to_end(item); self.hits += 1
+                return pickle.loads(blob)
+        if self.path:
+            row = self._db().execute("SELECT value FROM results WHERE kind = ? AND key = ?", item).fetchone()
+            if row is not None:
+                self._remember(item, row[0])
+                with self._lock: self.disk_hits += 1
+                return pickle.loads(row[0])
+        with self._lock: self.misses += 1
+        return default
+
+    def put(self, kind, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember((kind, key), blob)
+        if self.path:
+            with self._db() as conn:
+                conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (kind, key, blob, time.time()))
+            with self._lock:
+                self._puts += 1; due = self._puts % self.prune_every == 0
+            if due: self.prune()
+
+    def prune(self):
+        """디스크 저장소에서 보관 기간이 지난 항목과 크기 한도를 넘는 오래된 항목 삭제, 삭제 건수 반환"""
+        if not self.path: return 0
+        with self._db() as conn:
+            removed = conn.execute("DELETE FROM results WHERE created < ?", (time.time() - self.max_age_s,)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM results").fetchone()[0]
+            if total > self.max_disk_bytes:
+                # 최신 항목부터 누적한 크기가 한도를 넘는 첫 저장 시각 이전을 모두 삭제
+                cutoff = conn.execute(
+                    "SELECT created FROM (SELECT created, SUM(LENGTH(value)) OVER (ORDER BY created DESC, rowid DESC) AS kept FROM results) "
+                    "WHERE kept > ? ORDER BY created DESC LIMIT 1", (self.max_disk_bytes,)).fetchone()[0]
+                removed += conn.execute("DELETE FROM results WHERE created <= ?", (cutoff,)).rowcount
+        return removed
+
+    def get_or_compute(self, kind, key, func):
+        """캐시 값 반환, 없으면 func()로 계산해 저장 (반환: 값, 적중 여부)"""
+        missing = object()
+        value = self.get(kind, key, missing)
+        if value is not missing: return value, True
+        value = func()
+        self.put(kind, key, value)
+        return value, False
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._items.clear(); self.bytes = 0
+        if disk and self.path:
+            with self._db() as conn: conn.execute("DELETE FROM results")
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self.bytes, "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """프로세스 공용 캐시 (모든 세션이 공유, 설정은 환경 변수)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            mb = float(os.environ.get("BUOYANCY_CACHE_MB", "64"))
+            disk_mb = float(os.environ.get("BUOYANCY_CACHE_DISK_MB", "256"))
+            days = float(os.environ.get("BUOYANCY_CACHE_DAYS", "30"))
+            _shared = ResultCache(int(mb * 2**20), os.environ.get("BUOYANCY_CACHE_DB") or None, int(disk_mb * 2**20), days * 86400)
+        return _shared
@@ -0,0 +1,99 @@
+"""부력 대책 최적화 (인장 앵커, 추가 하중, 토핑 증설, 배수에 의한 수위 저하)
+
+대책별 효과는 시공단계마다 선형이다.
+    ΣW_s = W_s + kb_s x Δ무근 + kt_s x Δ토핑 + n x P (앵커 저항력 포함)
+    ΣU   = U(gl_minus + 수위 저하)
+추가 하중/토핑/수위 저하 후보 격자 전체를 한 번에 브로드캐스트하고, 각 후보에서
+모든 시공단계의 목표 안전율을 만족하는 데 필요한 앵커 저항력을 구해 규격별 최소
+개수를 정한다. 후보 격자 전체의 공사비 중 최소값을 찾는다.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from buoyancy_engine import construction_stages, evaluate, safety_factor, uplift, with_stages
+
+# 단가 (만원): 앵커는 규격(kN)별 1개당, 무근/토핑은 m³당, 배수는 수위 저하 1 m당 (베이 분담분)
+DEFAULT_COSTS = {
+    "anchors": {300: 150.0, 500: 220.0, 700: 290.0, 1000: 380.0},
+    "ballast": 15.0, "topping": 12.0, "dewatering": 400.0,
+}
+MEASURES = {"anchor": "인장 앵커", "ballast": "추가 하중(무근)", "topping": "토핑 증설", "dewatering": "배수(수위 저하)"}
+
+Design = namedtuple("Design", ["label", "cost", "anchor_count", "anchor_capacity", "ballast", "topping", "drawdown", "fs"])
+OptimizeResult = namedtuple("OptimizeResult", ["stages", "fs_before", "best", "by_measure", "evaluated"])
+
+
+def optimize_countermeasures(inputs, costs=None, stages=None, target_fs=None, max_anchors=20,
+                             ballast_grid=None, topping_grid=None, drawdown_grid=None):
+    """모든 시공단계에서 target_fs를 만족하는 최소 공사비 대책
+
+    ballast_grid / topping_grid는 추가 두께 (mm), drawdown_grid는 수위 저하 (m) 후보다.
+    by_measure는 대책 하나만 쓸 때의 최적안 (불가능하면 None)이다.
+    """
+    costs = DEFAULT_COSTS if costs is None else costs
+    num_f = len(inputs["h"])
+    stages = construction_stages(num_f) if stages is None else stages
+    target = inputs["target_fs"] if target_fs is None else target_fs
+    ht = (inputs["h_soil"] + sum(inputs["h"])) / 1000
+    ballast_grid = np.arange(0, 1001, 50.0) if ballast_grid is None else np.asarray(ballast_grid, dtype=float)
+    topping_grid = np.arange(0, 1001, 50.0) if topping_grid is None else np.asarray(topping_grid, dtype=float)
+    if drawdown_grid is None:
+        # 기초 하부까지 수위를 낮추면 부력이 0이 되므로 그 깊이까지 0.1 m 간격
+        dry = ht + max(inputs["fd"], inputs["t_slab_bot"]) / 1000 - inputs["gl_minus"]
+        drawdown_grid = np.arange(0, max(dry, 0) + 0.1, 0.1)
+    drawdown_grid = np.asarray(drawdown_grid, dtype=float)
+
+    staged = with_stages(inputs, stages)
+    res = evaluate(staged)
+    area = (inputs["x_dist"] * inputs["y_dist"]) / 10**6
+    fa = (inputs["fw"] * inputs["flv"]) / 10**6
+    m_bot = np.asarray(stages.done, dtype=float)[:, -1]; m_r = np.asarray(stages.roof_done, dtype=float)
+    kb = inputs["unit_plain"] / 1000 * (fa + (area - fa) * m_bot)
+    kt = inputs["unit_topping"] / 1000 * area * m_r
+    u = uplift(inputs, gl_minus=inputs["gl_minus"] + drawdown_grid)
+
+    # 후보 축: (Δ무근 B, Δ토핑 T, 수위 저하 D, 시공단계 S)
+    w = (res.total_w + kb * ballast_grid[:, None, None, None] + kt * topping_grid[None, :, None, None])
+    need = np.maximum((target * u[None, None, :, None] - w).max(axis=-1), 0.0)
+
+    capacity = np.array(sorted(costs["anchors"]), dtype=float)
+    price = np.array([costs["anchors"][c] for c in sorted(costs["anchors"])], dtype=float)
+    count = np.ceil(need[..., None] / capacity - 1e-9)
+    anchor_cost = np.where(count <= max_anchors, count * price, np.inf)
+    pick = anchor_cost.argmin(axis=-1)
+    anchor_cost = np.take_along_axis(anchor_cost, pick[..., None], axis=-1)[..., 0]
+    count = np.take_along_axis(count, pick[..., None], axis=-1)[..., 0]
+    total = (anchor_cost
+             + costs["ballast"] * ballast_grid[:, None, None] / 1000 * area
+             + costs["topping"] * topping_grid[None, :, None] / 1000 * area
+             + costs["dewatering"] * drawdown_grid[None, None, :])
+
+    def design(label, mask):
+        cost = np.where(mask, total, np.inf)
+        b, t, d = np.unravel_index(cost.argmin(), cost.shape)
+        if not np.isfinite(cost[b, t, d]): return None
+        n = int(count[b, t, d]); cap = float(capacity[pick[b, t, d]]) if n else 0.0
+        fs = safety_factor(w[b, t, 0] + n * cap, u[d])
+        return Design(label, float(cost[b, t, d]), n, cap, float(ballast_grid[b]), float(topping_grid[t]), float(drawdown_grid[d]), fs)
+
+    no_anchor = count == 0
+    zero_b = (ballast_grid == 0)[:, None, None]; zero_t = (topping_grid == 0)[None, :, None]; zero_d = (drawdown_grid == 0)[None, None, :]
+    by_measure = {
+        "anchor": design(MEASURES["anchor"], zero_b & zero_t & zero_d),
+        "ballast": design(MEASURES["ballast"], no_anchor & zero_t & zero_d),
+        "topping": design(MEASURES["topping"], no_anchor & zero_b & zero_d),
+        "dewatering": design(MEASURES["dewatering"], no_anchor & zero_b & zero_t),
+    }
+    best = design("최적 조합", np.ones(total.shape, dtype=bool))
+    return OptimizeResult(stages.names, res.fs, best, by_measure, total.size * capacity.size)
+
+
+def describe(design):
+    """대책 내용 한 줄 요약"""
+    parts = []
+    if design.anchor_count: parts.append(f"앵커 {design.anchor_capacity:,.0f}kN x {design.anchor_count}개")
+    if design.ballast: parts.append(f"무근 +{design.ballast:,.0f}mm")
+    if design.topping: parts.append(f"토핑 +{design.topping:,.0f}mm")
+    if design.drawdown: parts.append(f"수위 저하 {design.drawdown:.1f}m")
+    return ", ".join(parts) or "대책 불필요"
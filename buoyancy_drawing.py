@@ -0,0 +1,264 @@
+"""부력 검토 도면 렌더링 (평면 치수 표기, 층고 단면도)
+
+폰트와 평면 원본 이미지는 프로세스당 한 번만 로드하고, 완성 도면은 입력값을
+키로 하는 LRU 캐시에 보관해 동일 입력의 재실행/다른 세션에서 다시 그리지 않는다.
+캐시된 이미지는 여러 호출자가 공유하므로 반환값을 직접 수정하지 않는다.
+
+앱 화면은 SVG 문자열 (section_svg, plan_svg)을 브라우저에서 그린다. PNG 바이트로
+남긴 래스터 도면은 엑셀 계산서에 넣는 단면도 (section_png) 하나뿐이며,
+overlay_text는 벤치마크의 래스터 비교 기준으로만 남아 있다.
+"""
+import base64
+import io
+import platform
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont
+
+RENDER_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    """시스템별 한글 폰트 로드 (저장소 내 직접 업로드 폰트 우선)"""
+    # 1. 만약 유저가 malgunbd.ttf 파일을 직접 업로드했다면 그것을 최우선 사용
+    try:
+        return ImageFont.truetype("malgunbd.ttf", size)
+    except:
+        pass
+
+    system = platform.system()
+    try:
+        if system == "Windows":
+            return ImageFont.truetype("malgunbd.ttf", size)
+        elif system == "Darwin": # macOS
+            return ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", size)
+        else: # Linux (Streamlit Cloud)
+            # 리눅스 시스템 폰트 경로들 탐색
+            paths = [
+                "/usr/share/fonts/truetype/nanum/NanumGothicBold.ttf",
+                "/usr/share/fonts/truetype/nanum/NanumGothic.ttf", 
+                "/usr/share/fonts/nanum/NanumGothicBold.ttf",
+                "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"
+            ]
+            for path in paths:
+                try: return ImageFont.truetype(path, size)
+                except: continue
+            return ImageFont.load_default()
+    except:
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=4)
+def load_base_image(img_path):
+    """평면 원본 이미지 디코딩 (경로당 한 번)"""
+    try: return Image.open(img_path).convert("RGB")
+    except Exception: return Image.new("RGB", (1000, 800), color=(220, 220, 220))
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def overlay_text(img_path, measurements):
+    """평면 이미지에 치수 표기, measurements는 ((x, y), 값, 세로여부) 튜플의 튜플"""
+    img = load_base_image(img_path).copy()
+    draw = ImageDraw.Draw(img)
+    
+    font = get_font(45)
+    
+    for pos, val, is_vertical in measurements:
+        text = f"{val:,}"; tw, th = draw.textbbox((0, 0), text, font=font)[2:4]; padding = 12; x, y = pos
+        if is_vertical:
+            txt_img = Image.new("RGBA", (tw + padding * 2, th + padding * 2), (255, 255, 255, 255))
+            ImageDraw.Draw(txt_img).text((padding, padding), text, fill="black", font=font)
+            rotated = txt_img.rotate(90, expand=True); img.paste(rotated, (x-rotated.width//2, y-rotated.height//2), rotated)
+        else:
+            draw.rectangle([x-tw//2-padding, y-th//2-padding, x+tw//2+padding, y+th//2+padding], fill="white")
+            draw.text((x, y), text, fill="black", font=font, anchor="mm")
+    return img
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def draw_dynamic_section(h_soil, floor_heights, fd, gl_minus):
+    """층고 단면도, floor_heights는 튜플로 전달 (캐시 키)"""
+    # 해상도 고정 및 배율 조정 (지하 2층 기준 높이로 고정)
+    scale = 2
+    img_h = 420 * scale  # 전체 높이 고정 (레이아웃 고정용)
+    img_w = 450 * scale
+    
+    # 층수에 따라 유동적으로 층별 높이 결정 (고정 높이 내에 배치)
+    num_f = len(floor_heights)
+    top_margin = 50 * scale
+    bottom_margin = 100 * scale
+    soil_h_px = 60 * scale
+    foot_h_px = 50 * scale
+    
+    # 가용 높이 계산 후 층별 높이 분배
+    available_h = img_h - top_margin - bottom_margin - soil_h_px - foot_h_px
+    row_h_px = available_h / num_f
+    
+    img = Image.new("RGB", (img_w, img_h), color="white")
+    draw = ImageDraw.Draw(img)
+    
+    try: font_size = 18 if num_f <= 2 else (16 if num_f <= 4 else 14)
+    except: font_size = 15
+    font = get_font(font_size * scale)
+    
+    gl_y = top_margin
+    draw.line([(30 * scale, gl_y), (320 * scale, gl_y)], fill="black", width=2 * scale)
+    draw.text((325 * scale, gl_y), "GL", fill="red", font=font, anchor="lm")
+    
+    # Soil (건물 너비를 100 -> 250으로 키움)
+    draw.rectangle([100 * scale, gl_y, 300 * scale, gl_y + soil_h_px], fill="#F0F0F0", outline="black", width=1 * scale)
+    draw.line([(80 * scale, gl_y), (80 * scale, gl_y + soil_h_px)], fill="black", width=1 * scale)
+    draw.text((75 * scale, gl_y + soil_h_px/2), f"{h_soil:,}", fill="black", font=font, anchor="rm")
+    draw.text((200 * scale, gl_y + soil_h_px/2), "흙높이", fill="#666666", font=font, anchor="mm")
+    
+    curr_y = gl_y + soil_h_px
+    # Floors
+    for i, fh in enumerate(floor_heights):
+        draw.rectangle([100 * scale, curr_y, 300 * scale, curr_y + row_h_px], outline="black", width=1 * scale)
+        draw.line([(100 * scale, curr_y), (300 * scale, curr_y)], fill="black", width=3 * scale)
+        draw.line([(80 * scale, curr_y), (80 * scale, curr_y + row_h_px)], fill="black", width=1 * scale)
+        draw.text((75 * scale, curr_y + row_h_px/2), f"{fh:,}", fill="black", font=font, anchor="rm")
+        draw.text((200 * scale, curr_y + row_h_px/2), f"B{i+1}F", fill="#666666", font=font, anchor="mm")
+        curr_y += row_h_px
+        
+    # Footing
+    foot_h = 50 * scale
+    draw.rectangle([50 * scale, curr_y, 350 * scale, curr_y + foot_h], fill="#E0E0E0", outline="black", width=1 * scale)
+    draw.text((200 * scale, curr_y + foot_h/2), f"기초 ({fd:,})", fill="black", font=font, anchor="mm")
+
+    # GWL 위치 계산
+    gwl_y = gl_y + _gwl_offset(gl_minus, h_soil, floor_heights, soil_h_px, row_h_px, foot_h)
+
+    # GWL 그리기
+    draw.line([(310 * scale, gwl_y), (340 * scale, gwl_y)], fill="blue", width=1 * scale)
+    tri_h = 10 * scale
+    draw.polygon([(325 * scale, gwl_y), ((325-6)*scale, gwl_y-tri_h), ((325+6)*scale, gwl_y-tri_h)], outline="blue", fill="white")
+    draw.line([(321 * scale, gwl_y + 4 * scale), (329 * scale, gwl_y + 4 * scale)], fill="blue", width=1 * scale)
+    draw.text((345 * scale, gwl_y), f"(GL-{gl_minus})", fill="blue", font=font, anchor="lm")
+        
+    return img
+
+def _gwl_offset(gl_minus, h_soil, floor_heights, soil_h, row_h, foot_h):
+    """GL에서 지하수위 표시선까지의 도면 거리 (흙, 층, 기초 구간별 비례 배분)"""
+    depth = gl_minus * 1000
+    if depth <= h_soil: return (depth / h_soil if h_soil > 0 else 0) * soil_h
+    offset = soil_h; rem = depth - h_soil
+    for fh in floor_heights:
+        if rem <= fh: return offset + rem / fh * row_h
+        offset += row_h; rem -= fh
+    return offset + min(rem / 1000, 1.0) * foot_h
+
+def png_bytes(img):
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def section_png(h_soil, floor_heights, fd, gl_minus):
+    """층고 단면도 PNG 바이트"""
+    return png_bytes(draw_dynamic_section(h_soil, floor_heights, fd, gl_minus))
+
+def _fs_color(ratio):
+    """FS/목표 안전율 비율 색상 (NG 빨강, OK 파랑 계열, 1.0 근처는 옅게)"""
+    if ratio < 1:
+        t = min(1 - ratio, 1.0) * 0.85 + 0.15; base = (211, 47, 47)
+    else:
+        t = min(ratio - 1, 1.0) * 0.85 + 0.15; base = (25, 118, 210)
+    return tuple(int(255 + (c - 255) * t) for c in base)
+
+def draw_fs_heatmap(x_edges, y_edges, fs, target_fs, width=900):
+    """베이 격자 FS 평면 분포도, fs는 (ny, nx) 배열 (행 0을 도면 아래쪽에 배치)"""
+    margin = 60
+    total_x = float(x_edges[-1]); total_y = float(y_edges[-1])
+    px = (width - margin * 2) / total_x
+    height = int(total_y * px) + margin * 2
+    img = Image.new("RGB", (width, height), color="white")
+    draw = ImageDraw.Draw(img)
+    ny, nx = fs.shape
+    cell_min = min(min(x_edges[1:] - x_edges[:-1]), min(y_edges[1:] - y_edges[:-1])) * px
+    font = get_font(max(10, min(int(cell_min / 4), 28)))
+    label_font = get_font(20)
+
+    def to_px(x, y): return margin + x * px, height - margin - y * px
+
+    for r in range(ny):
+        for c in range(nx):
+            x0, y1 = to_px(x_edges[c], y_edges[r]); x1, y0 = to_px(x_edges[c + 1], y_edges[r + 1])
+            draw.rectangle([x0, y0, x1, y1], fill=_fs_color(fs[r, c] / target_fs), outline="black", width=1)
+            if cell_min >= 30:
+                draw.text(((x0 + x1) / 2, (y0 + y1) / 2), f"{fs[r, c]:.2f}", fill="black", font=font, anchor="mm")
+    for c in range(nx):
+        x, _ = to_px((x_edges[c] + x_edges[c + 1]) / 2, 0)
+        draw.text((x, height - margin / 2), f"X{c+1}", fill="#333333", font=label_font, anchor="mm")
+    for r in range(ny):
+        _, y = to_px(0, (y_edges[r] + y_edges[r + 1]) / 2)
+        draw.text((margin / 2, y), f"Y{r+1}", fill="#333333", font=label_font, anchor="mm")
+    return img
+
+# ---------------------------------------------------------
+# SVG 벡터 도면 (브라우저에서 확대/인쇄, 서버 래스터화 없음)
+# ---------------------------------------------------------
+SVG_FONT = "'Malgun Gothic','맑은 고딕','NanumGothic',sans-serif"
+
+def _svg_text(x, y, text, size, fill="black", anchor="middle", extra=""):
+    return (f'<text x="{x:g}" y="{y:g}" font-size="{size}" fill="{fill}" text-anchor="{anchor}" '
+            f'dominant-baseline="central"{extra}>{escape(str(text))}</text>')
+
+def _svg(width, height, body):
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width:g} {height:g}" style="display:block;width:100%;height:auto" '
+            f'font-family="{SVG_FONT}" font-weight="bold">{"".join(body)}</svg>')
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def section_svg(h_soil, floor_heights, fd, gl_minus):
+    """층고 단면도 SVG (draw_dynamic_section과 같은 배치, 450x420 좌표계)"""
+    w, h = 450, 420
+    num_f = len(floor_heights)
+    gl_y = 50; soil_h = 60; foot_h = 50
+    row_h = (h - 50 - 100 - soil_h - foot_h) / num_f
+    fs = 18 if num_f <= 2 else (16 if num_f <= 4 else 14)
+
+    body = [f'<rect width="{w}" height="{h}" fill="white"/>',
+            f'<line x1="30" y1="{gl_y}" x2="320" y2="{gl_y}" stroke="black" stroke-width="2"/>',
+            _svg_text(325, gl_y, "GL", fs, "red", "start"),
+            f'<rect x="100" y="{gl_y}" width="200" height="{soil_h}" fill="#F0F0F0" stroke="black"/>',
+            f'<line x1="80" y1="{gl_y}" x2="80" y2="{gl_y + soil_h}" stroke="black"/>',
+            _svg_text(75, gl_y + soil_h / 2, f"{h_soil:,}", fs, anchor="end"),
+            _svg_text(200, gl_y + soil_h / 2, "흙높이", fs, "#666666")]
+    y = gl_y + soil_h
+    for i, fh in enumerate(floor_heights):
+        body += [f'<rect x="100" y="{y:g}" width="200" height="{row_h:g}" fill="none" stroke="black"/>',
+                 f'<line x1="100" y1="{y:g}" x2="300" y2="{y:g}" stroke="black" stroke-width="3"/>',
+                 f'<line x1="80" y1="{y:g}" x2="80" y2="{y + row_h:g}" stroke="black"/>',
+                 _svg_text(75, y + row_h / 2, f"{fh:,}", fs, anchor="end"),
+                 _svg_text(200, y + row_h / 2, f"B{i+1}F", fs, "#666666")]
+        y += row_h
+    body += [f'<rect x="50" y="{y:g}" width="300" height="{foot_h}" fill="#E0E0E0" stroke="black"/>',
+             _svg_text(200, y + foot_h / 2, f"기초 ({fd:,})", fs)]
+
+    gy = gl_y + _gwl_offset(gl_minus, h_soil, floor_heights, soil_h, row_h, foot_h)
+    body += [f'<line x1="310" y1="{gy:g}" x2="340" y2="{gy:g}" stroke="blue"/>',
+             f'<polygon points="325,{gy:g} 319,{gy - 10:g} 331,{gy - 10:g}" fill="white" stroke="blue"/>',
+             f'<line x1="321" y1="{gy + 4:g}" x2="329" y2="{gy + 4:g}" stroke="blue"/>',
+             _svg_text(345, gy, f"(GL-{gl_minus})", fs, "blue", "start")]
+    return _svg(w, h, body)
+
+@lru_cache(maxsize=4)
+def _image_data_uri(img_path):
+    """평면 원본을 data URI로 (경로당 한 번), 256색 이하 도면은 팔레트 PNG로 무손실 축소"""
+    img = load_base_image(img_path)
+    if img.getcolors(256) is not None: img = img.convert("P", palette=Image.Palette.ADAPTIVE, colors=256)
+    buf = io.BytesIO(); img.save(buf, format="PNG", optimize=True)
+    return f"data:image/png;base64,{base64.b64encode(buf.getvalue()).decode('ascii')}"
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def plan_svg(img_path, measurements):
+    """평면 원본 위에 치수 표기를 벡터 문자로 얹은 SVG (overlay_text와 같은 위치/크기)"""
+    w, h = load_base_image(img_path).size
+    body = [f'<image href="{_image_data_uri(img_path)}" width="{w}" height="{h}"/>']
+    size = 45; padding = 12
+    for (x, y), val, is_vertical in measurements:
+        text = f"{val:,}"
+        tw = size * (0.6 * sum(ch.isdigit() for ch in text) + 0.3 * sum(not ch.isdigit() for ch in text)); th = size
+        rot = f' transform="rotate(-90 {x} {y})"' if is_vertical else ""
+        body.append(f'<g{rot}><rect x="{x - tw / 2 - padding:g}" y="{y - th / 2 - padding:g}" width="{tw + padding * 2:g}" '
+                    f'height="{th + padding * 2:g}" fill="white"/>{_svg_text(x, y, text, size)}</g>')
+    return _svg(w, h, body)
@@ -0,0 +1,399 @@
+"""시공단계 부력 검토 계산 엔진 (Streamlit 비의존, NumPy 배치 계산)"""
+from collections import namedtuple
+
+import numpy as np
+
+# 단위중량 (kN/m³)
+UNIT_TOPPING = 18.0
+UNIT_PLAIN = 23.0
+UNIT_WATER = 10.0
+
+# 시나리오 단위 입력 (사이드바 + 설계하중 + 지붕층 + 기초)
+SCALAR_DEFAULTS = {
+    "x_dist": 8200, "y_dist": 8200, "h_soil": 1200, "fd": 900,
+    "gl_minus": 2.35, "target_fs": 1.2, "unit_c": 24.0, "unit_topping": UNIT_TOPPING, "unit_plain": UNIT_PLAIN,
+    "t_topping": 1100, "t_plain_r": 100, "t_slab_r": 250, "l_cl_r": 0.3,
+    "t_slab_mid": 150, "l_cl_f": 0.3,
+    "t_plain_bot": 100, "t_slab_bot": 400,
+    "roof_done": True,
+    "bw_rb1": 500, "bh_rb1": 900, "bw_rg1": 500, "bh_rg1": 900, "bw_rg2": 700, "bh_rg2": 900,
+    "fw": 3000, "flv": 3000,
+}
+
+# 층 단위 입력 (B1F부터 최하층 순서, 마지막 층이 기초와 접하는 최하층)
+FLOOR_DEFAULTS = {
+    "h": 5380, "done": True,
+    "bw_b1": 400, "bh_b1": 600, "bw_g1": 400, "bh_g1": 600, "bw_g2": 500, "bh_g2": 600,
+    "bw_c": 500, "bh_c": 700,
+}
+FIRST_FLOOR_HEIGHT = 4050
+
+SCALAR_FIELDS = tuple(SCALAR_DEFAULTS)
+FLOOR_FIELDS = tuple(FLOOR_DEFAULTS)
+
+BuoyancyResult = namedtuple("BuoyancyResult", ["total_w", "u_total", "fs", "ok"])
+Contributions = namedtuple("Contributions", ["base", "roof", "floors"])
+
+
+def default_inputs(num_floors=2, **overrides):
+    """앱 기본값으로 채운 단일 시나리오 입력 (층 입력은 길이 num_floors 리스트)"""
+    inputs = dict(SCALAR_DEFAULTS)
+    for name, value in FLOOR_DEFAULTS.items():
+        inputs[name] = [value] * num_floors
+    inputs["h"] = [FIRST_FLOOR_HEIGHT if i == 0 else FLOOR_DEFAULTS["h"] for i in range(num_floors)]
+    inputs.update(overrides)
+    return inputs
+
+
+def flat_inputs(inputs):
+    """층 입력 리스트를 {name}_{i} 키로 펼친 단일 시나리오 입력 (배치 파일 열 이름과 동일)"""
+    flat = {name: inputs[name] for name in SCALAR_FIELDS}
+    for name in FLOOR_FIELDS:
+        for i, value in enumerate(inputs[name]): flat[f"{name}_{i}"] = value
+    return flat
+
+
+def nested_inputs(flat, num_floors):
+    """flat_inputs의 역변환, 값은 스칼라 또는 (N,) 배열"""
+    inputs = {name: flat[name] for name in SCALAR_FIELDS}
+    for name in FLOOR_FIELDS:
+        values = [flat[f"{name}_{i}"] for i in range(num_floors)]
+        inputs[name] = np.stack([np.asarray(v) for v in values], axis=-1)
+    return inputs
+
+
+def _as_arrays(inputs):
+    """입력을 (N,) 시나리오 배열과 (N, F) 층 배열로 브로드캐스트"""
+    floors = [np.atleast_1d(np.asarray(inputs[name], dtype=float)) for name in FLOOR_FIELDS]
+    scalars = [np.asarray(inputs[name], dtype=float) for name in SCALAR_FIELDS]
+    num_f = floors[0].shape[-1]
+    n = np.broadcast_shapes(*(a.shape for a in scalars), *(a.shape[:-1] for a in floors))
+    scalars = [np.broadcast_to(a, n) for a in scalars]
+    floors = [np.broadcast_to(a, n + (num_f,)) for a in floors]
+    return dict(zip(SCALAR_FIELDS, scalars)), dict(zip(FLOOR_FIELDS, floors))
+
+
+def beam_weight(unit_c, w, h, t, l, m):
+    """보 자중: 슬래브 두께를 뺀 춤 x 폭 x 길이 (mm 입력, kN)"""
+    return unit_c * (w / 1000) * (h / 1000 - t / 1000) * l * m
+
+
+def roof_load(unit_c, t_topping, t_plain_r, t_slab_r, l_cl_r, unit_topping=UNIT_TOPPING, unit_plain=UNIT_PLAIN):
+    return (unit_topping * t_topping / 1000) + (unit_plain * t_plain_r / 1000) + (unit_c * t_slab_r / 1000) + l_cl_r
+
+
+def floor_load_mid(unit_c, t_slab_mid, l_cl_f):
+    return (unit_c * t_slab_mid / 1000) + l_cl_f
+
+
+def floor_load_bot(unit_c, t_plain_bot, t_slab_bot, unit_plain=UNIT_PLAIN):
+    return (unit_plain * t_plain_bot / 1000) + (unit_c * t_slab_bot / 1000)
+
+
+def column_weight(unit_c, w, h, fh, m):
+    """기둥 자중: 가로 x 세로 x 층고 (mm 입력, kN)"""
+    return unit_c * (w / 1000) * (h / 1000) * (fh / 1000) * m
+
+
+def base_weight(fl_bot, unit_c, fd, t_slab_bot, fa):
+    """기초부 자중: 최하층 바닥 하중 + 슬래브 하부 기초 두께분 (기초 면적 fa)"""
+    return (fl_bot + unit_c * (fd / 1000 - t_slab_bot / 1000)) * fa
+
+
+def uplift_parts(wh, t_slab_bot, fd, area, fa):
+    """일반구간 부력 U1과 기초구간 부력 U2 (wh: 최하층 슬래브 상면 기준 수두, m)"""
+    u1 = UNIT_WATER * (wh + t_slab_bot / 1000) * (area - fa)
+    u2 = UNIT_WATER * (wh + fd / 1000) * fa
+    return u1, u2
+
+
+def contributions(inputs):
+    """시공 여부(m)를 1로 둔 부재별 하중 기여분
+
+    ΣW = base + roof x m_r + Σ floors[..., i] x m_f[i] 로 조합되므로
+    시공단계 조합을 바꿀 때 기여분을 다시 계산할 필요가 없다.
+    """
+    s, f = _as_arrays(inputs)
+    unit_c = s["unit_c"]; x_l = s["x_dist"] / 1000; y_l = s["y_dist"] / 1000
+    area = (s["x_dist"] * s["y_dist"]) / 10**6
+    fa = (s["fw"] * s["flv"]) / 10**6
+
+    t_r = s["t_slab_r"]
+    roof = roof_load(unit_c, s["t_topping"], s["t_plain_r"], t_r, s["l_cl_r"], s["unit_topping"], s["unit_plain"]) * area
+    roof = roof + beam_weight(unit_c, s["bw_rb1"], s["bh_rb1"], t_r, x_l, 1.0)
+    roof = roof + beam_weight(unit_c, s["bw_rg1"], s["bh_rg1"], t_r, y_l, 1.0)
+    roof = roof + beam_weight(unit_c, s["bw_rg2"], s["bh_rg2"], t_r, x_l, 1.0)
+
+    uc = unit_c[..., None]; xl = x_l[..., None]; yl = y_l[..., None]
+    t_mid = s["t_slab_mid"][..., None]
+    floors = column_weight(uc, f["bw_c"], f["bh_c"], f["h"], 1.0)
+    mid = floor_load_mid(uc, t_mid, s["l_cl_f"][..., None]) * area[..., None]
+    mid = mid + beam_weight(uc, f["bw_b1"], f["bh_b1"], t_mid, xl, 1.0)
+    mid = mid + beam_weight(uc, f["bw_g1"], f["bh_g1"], t_mid, yl, 1.0)
+    mid = mid + beam_weight(uc, f["bw_g2"], f["bh_g2"], t_mid, xl, 1.0)
+    fl_bot = floor_load_bot(unit_c, s["t_plain_bot"], s["t_slab_bot"], s["unit_plain"])
+    bottom = fl_bot * (area - fa)
+    floors = floors + np.concatenate([mid[..., :-1], bottom[..., None]], axis=-1)
+
+    # 기초부는 시공 완료를 가정
+    base = base_weight(fl_bot, unit_c, s["fd"], s["t_slab_bot"], fa)
+    return Contributions(base, roof, floors)
+
+
+def uplift(inputs, gl_minus=None):
+    """총 부력 ΣU = U1(일반구간) + U2(기초구간), gl_minus를 주면 입력값 대신 사용"""
+    s, f = _as_arrays(inputs)
+    area = (s["x_dist"] * s["y_dist"]) / 10**6
+    fa = (s["fw"] * s["flv"]) / 10**6
+    ht = (s["h_soil"] + f["h"].sum(axis=-1)) / 1000
+    wh = ht - (s["gl_minus"] if gl_minus is None else np.asarray(gl_minus, dtype=float))
+    u1, u2 = uplift_parts(wh, s["t_slab_bot"], s["fd"], area, fa)
+    return u1 + u2
+
+
+def safety_factor(total_w, u_total):
+    total_w = np.asarray(total_w, dtype=float); u_total = np.asarray(u_total, dtype=float)
+    safe_u = np.where(u_total > 0, u_total, 1.0)
+    return np.where(u_total > 0, total_w / safe_u, 0.0)
+
+
+def evaluate(inputs):
+    """ΣW, ΣU, FS 일괄 계산
+
+    시나리오 입력은 스칼라 또는 (N,) 배열, 층 입력은 (F,) 또는 (N, F) 배열로
+    주며 모두 NumPy 브로드캐스트 규칙으로 맞춘다.
+    """
+    s, f = _as_arrays(inputs)
+    c = contributions(inputs)
+    m_f = (f["done"] != 0).astype(float)
+    m_r = (s["roof_done"] != 0).astype(float)
+    total_w = c.base + c.roof * m_r + (c.floors * m_f).sum(axis=-1)
+    u_total = uplift(inputs)
+    fs = safety_factor(total_w, u_total)
+    return BuoyancyResult(total_w, u_total, fs, fs >= s["target_fs"])
+
+
+Stages = namedtuple("Stages", ["names", "done", "roof_done"])
+
+
+def construction_stages(num_floors):
+    """기초 타설 후 최하층부터 B1F, 지붕층 순으로 완료되는 순타 시공단계
+
+    done은 (S, F), roof_done은 (S,) 배열로 evaluate 입력에 그대로 넣을 수 있다.
+    """
+    names = ["기초"] + [f"B{i+1}F" for i in reversed(range(num_floors))] + ["지붕층"]
+    done = np.zeros((num_floors + 2, num_floors), dtype=bool)
+    for k in range(1, num_floors + 2):
+        done[k, num_floors - min(k, num_floors):] = True
+    roof_done = np.zeros(num_floors + 2, dtype=bool); roof_done[-1] = True
+    return Stages(names, done, roof_done)
+
+
+def with_stages(inputs, stages):
+    """입력의 시공 완료 여부를 시공단계 배열로 교체 (결과는 시공단계 축 (S,)을 가짐)"""
+    staged = dict(inputs)
+    staged["done"] = stages.done
+    staged["roof_done"] = stages.roof_done
+    return staged
+
+
+def _uplift_coeffs(inputs):
+    """ΣU = slope x wh + offset 의 계수와 전체 높이 ht (wh = ht - gl_minus)"""
+    s, f = _as_arrays(inputs)
+    area = (s["x_dist"] * s["y_dist"]) / 10**6
+    fa = (s["fw"] * s["flv"]) / 10**6
+    ht = (s["h_soil"] + f["h"].sum(axis=-1)) / 1000
+    slope = UNIT_WATER * area
+    offset = sum(uplift_parts(0.0, s["t_slab_bot"], s["fd"], area, fa))
+    return ht, slope, offset
+
+
+def critical_gwl(inputs, target_fs=None):
+    """FS가 목표 안전율과 같아지는 지하수위 (GL-m)
+
+    부력은 수위에 대해 선형이므로 ΣW / target_fs = slope x wh + offset 을 직접 푼다.
+    반환값보다 수위가 얕아지면(GL-m 값이 작아지면) FS가 목표 안전율 미만이 된다.
+    """
+    s, _ = _as_arrays(inputs)
+    target = s["target_fs"] if target_fs is None else np.asarray(target_fs, dtype=float)
+    total_w = evaluate(inputs).total_w
+    ht, slope, offset = _uplift_coeffs(inputs)
+    wh = (total_w / target - offset) / slope
+    return ht - wh
+
+
+def fs_curve(inputs, gl_grid):
+    """지하수위 격자 (G,)에 대한 FS 곡선, 반환 형상은 입력 형상 + (G,)"""
+    gl_grid = np.asarray(gl_grid, dtype=float)
+    total_w = evaluate(inputs).total_w[..., None]
+    ht, slope, offset = _uplift_coeffs(inputs)
+    u_total = slope[..., None] * (ht[..., None] - gl_grid) + offset[..., None]
+    return safety_factor(total_w, u_total)
+
+
+# 시공 방식: 순타는 최하층부터 B1F까지 올라온 뒤 지붕층, 역타는 지붕층부터 B1F, B2F ... 순으로 내려간다
+SEQUENCE_METHODS = {"bottom_up": "순타 (최하층 → 지붕층)", "top_down": "역타 (지붕층 → 최하층)"}
+
+
+def buildable_states(num_floors, methods=tuple(SEQUENCE_METHODS)):
+    """explore_sequences의 allowed 마스크: 지정한 시공 방식으로 거칠 수 있는 상태만 True
+
+    상태 비트 규칙은 explore_sequences와 같다 (비트 j < F는 B(j+1)F, 비트 F는 지붕층).
+    """
+    roof = 1 << num_floors
+    allowed = np.zeros(1 << (num_floors + 1), dtype=bool)
+    for method in methods:
+        if method == "bottom_up":
+            # 최하층 B{F}F (비트 F-1)부터 k개 층 완료, 모든 층이 끝난 뒤 지붕층
+            states = [((1 << num_floors) - 1) ^ ((1 << (num_floors - k)) - 1) for k in range(num_floors + 1)]
+            states.append(states[-1] | roof)
+        elif method == "top_down":
+            states = [0] + [roof | ((1 << k) - 1) for k in range(num_floors + 1)]
+        else:
+            raise ValueError(f"지원하지 않는 시공 방식: {method}")
+        allowed[states] = True
+    return allowed
+
+
+SequenceResult = namedtuple("SequenceResult", ["names", "bits", "total_w", "u_total", "fs", "unsafe", "order", "path_fs", "path_shortfall"])
+
+
+def explore_sequences(inputs, target_fs=None, allowed=None):
+    """모든 층/지붕층 시공 완료 조합 (2^(F+1) 상태)의 FS와 최소 위험 타설 순서
+
+    상태 비트 j (j < F)는 B(j+1)F, 비트 F는 지붕층 완료를 뜻한다. 부재별 기여분을
+    한 번만 계산한 뒤 상태 비트 행렬과의 곱으로 전 상태의 ΣW를 구한다.
+    타설 순서는 빈 상태에서 전체 완료 상태까지 한 부재씩 추가하는 경로 중 거치는
+    상태의 안전율 부족분 (target_fs - FS)+ 합이 최소인 경로를 부분집합 DP로 찾는다.
+    allowed (2^(F+1),)로 시공 불가능한 상태를 제외할 수 있다.
+    """
+    c = contributions(inputs)
+    num_f = c.floors.shape[-1]; k = num_f + 1
+    names = [f"B{i+1}F" for i in range(num_f)] + ["지붕층"]
+    states = np.arange(1 << k)
+    bits = ((states[:, None] >> np.arange(k)) & 1).astype(bool)
+    member_w = np.append(c.floors, c.roof)
+    total_w = c.base + bits @ member_w
+    u_total = uplift(inputs)
+    fs = safety_factor(total_w, u_total)
+    target = inputs["target_fs"] if target_fs is None else target_fs
+    unsafe = fs < target
+
+    cost = np.maximum(target - fs, 0.0)
+    if allowed is not None: cost = np.where(allowed, cost, np.inf)
+    best = np.full(states.size, np.inf); prev = np.full(states.size, -1)
+    best[0] = cost[0]
+    popcount = bits.sum(axis=1)
+    for n in range(1, k + 1):
+        layer = states[popcount == n]
+        cand = np.full((layer.size, k), np.inf)
+        for j in range(k):
+            has = bits[layer, j]
+            cand[has, j] = best[layer[has] ^ (1 << j)]
+        j_best = cand.argmin(axis=1)
+        best[layer] = cost[layer] + cand[np.arange(layer.size), j_best]
+        prev[layer] = layer ^ (1 << j_best)
+
+    path = [states[-1]]
+    while path[-1] != 0 and prev[path[-1]] >= 0: path.append(prev[path[-1]])
+    path = path[::-1]
+    order = [names[int(np.log2(b ^ a))] for a, b in zip(path[:-1], path[1:])]
+    return SequenceResult(names, bits, total_w, u_total, fs, unsafe, order, fs[path], best[-1])
+
+
+# 계산 근거 산식 템플릿 (args를 순서대로 채움, 보고서/상세 보기 요청 시에만 문자열 생성)
+FORMULAS = {
+    "roof_slab": "({0:g}*({1}) + {2:g}*({3}) + {4}*({5}) + {6}) x {7:.2f} x {8}",
+    "beam": "{0} x {1} x ({2} - {3}) x {4} x {5}",
+    "column": "{0} x {1} x {2} x {3} x {4}",
+    "mid_slab": "({0}*({1}) + {2}) x {3:.2f} x {4}",
+    "bot_slab": "({0:g}*({1}) + {2}*({3})) x ({4:.2f}-{5:.2f}) x {6}",
+    "base": "(({0:g}*({1}) + {2}*({3})) + {2} x ({4}-{3})) x {5:.2f}",
+    "u1": "10 x ({0:.3f} + {1}) x ({2:.2f} - {3:.2f})",
+    "u2": "10 x ({0:.3f} + {1}) x {2:.2f}",
+    "u_sum": "U1 + U2",
+}
+U_LABELS = {"U1": "일반구간 부력 (U1)", "U2": "기초구간 부력 (U2)", "ΣU": "총 부력 합계 (ΣU)"}
+
+Term = namedtuple("Term", ["name", "floor", "kind", "args", "value"])
+Trace = namedtuple("Trace", ["total_w", "u_total", "fs", "roof", "floors", "uplift"])
+
+
+def calc_trace(inputs):
+    """단일 시나리오 계산과 항별 구조화 기록 (부재명, 층, 산식 종류, 인자, 값)
+
+    문자열은 만들지 않으며 term_label / term_expr / trace_rows로 필요할 때 렌더링한다.
+    """
+    unit_c = inputs["unit_c"]; x_l = inputs["x_dist"] / 1000; y_l = inputs["y_dist"] / 1000
+    unit_tp = inputs["unit_topping"]; unit_pl = inputs["unit_plain"]
+    area = (inputs["x_dist"] * inputs["y_dist"]) / 10**6
+    fd = inputs["fd"]; fa = (inputs["fw"] * inputs["flv"]) / 10**6
+    t_r = inputs["t_slab_r"]; t_mid = inputs["t_slab_mid"]; t_bot = inputs["t_slab_bot"]; t_pb = inputs["t_plain_bot"]
+    num_floors = len(inputs["h"])
+    fl_mid = floor_load_mid(unit_c, t_mid, inputs["l_cl_f"])
+    fl_bot = floor_load_bot(unit_c, t_pb, t_bot, unit_pl)
+
+    def beam(name, floor, w, h, t, l, m):
+        return Term(name, floor, "beam", (unit_c, w / 1000, h / 1000, t / 1000, l, m), beam_weight(unit_c, w, h, t, l, m))
+
+    m_r = 1.0 if inputs["roof_done"] else 0.0
+    roof = [
+        Term("슬래브", None, "roof_slab",
+             (unit_tp, inputs["t_topping"] / 1000, unit_pl, inputs["t_plain_r"] / 1000, unit_c, t_r / 1000, inputs["l_cl_r"], area, m_r),
+             roof_load(unit_c, inputs["t_topping"], inputs["t_plain_r"], t_r, inputs["l_cl_r"], unit_tp, unit_pl) * area * m_r),
+        beam("B1", None, inputs["bw_rb1"], inputs["bh_rb1"], t_r, x_l, m_r),
+        beam("G1", None, inputs["bw_rg1"], inputs["bh_rg1"], t_r, y_l, m_r),
+        beam("G2", None, inputs["bw_rg2"], inputs["bh_rg2"], t_r, x_l, m_r),
+    ]
+
+    floors = []
+    for i in range(num_floors):
+        fh = inputs["h"][i] / 1000; m_f = 1.0 if inputs["done"][i] else 0.0
+        bw_c = inputs["bw_c"][i]; bh_c = inputs["bh_c"][i]
+        terms = [Term("기둥", i, "column", (unit_c, bw_c / 1000, bh_c / 1000, fh, m_f), column_weight(unit_c, bw_c, bh_c, inputs["h"][i], m_f))]
+        if i == num_floors - 1:
+            terms.append(Term("슬래브", i, "bot_slab", (unit_pl, t_pb / 1000, unit_c, t_bot / 1000, area, fa, m_f), fl_bot * (area - fa) * m_f))
+            terms.append(Term("기초부", i, "base", (unit_pl, t_pb / 1000, unit_c, t_bot / 1000, fd / 1000, fa),
+                              base_weight(fl_bot, unit_c, fd, t_bot, fa)))
+        else:
+            terms.append(Term("슬래브", i, "mid_slab", (unit_c, t_mid / 1000, inputs["l_cl_f"], area, m_f), fl_mid * area * m_f))
+            terms.append(beam("B1", i, inputs["bw_b1"][i], inputs["bh_b1"][i], t_mid, x_l, m_f))
+            terms.append(beam("G1", i, inputs["bw_g1"][i], inputs["bh_g1"][i], t_mid, y_l, m_f))
+            terms.append(beam("G2", i, inputs["bw_g2"][i], inputs["bh_g2"][i], t_mid, x_l, m_f))
+        floors.append(terms)
+
+    ht = (inputs["h_soil"] + sum(inputs["h"])) / 1000; wh = ht - inputs["gl_minus"]
+    u1, u2 = uplift_parts(wh, t_bot, fd, area, fa)
+    u_total = u1 + u2
+    uplift_terms = [
+        Term("U1", None, "u1", (wh, t_bot / 1000, area, fa), u1),
+        Term("U2", None, "u2", (wh, fd / 1000, fa), u2),
+        Term("ΣU", None, "u_sum", (), u_total),
+    ]
+    total_w = sum(t.value for t in roof) + sum(t.value for terms in floors for t in terms)
+    fs_val = total_w / u_total if u_total > 0 else 0
+    return Trace(total_w, u_total, fs_val, roof, floors, uplift_terms)
+
+
+def term_label(term):
+    if term.name in U_LABELS: return U_LABELS[term.name]
+    return f"지붕층 {term.name}" if term.floor is None else f"지하{term.floor+1}층 {term.name}"
+
+
+def term_expr(term):
+    return FORMULAS[term.kind].format(*term.args)
+
+
+def trace_rows(terms):
+    """[부재명, 상세 산식, 하중(kN)] 표 행으로 렌더링"""
+    return [[term_label(t), term_expr(t), f"{t.value:,.2f}"] for t in terms]
+
+
+def calc_details(inputs):
+    """단일 시나리오의 계산 근거 표 (지붕층, 층별, 부력)와 결과"""
+    trace = calc_trace(inputs)
+    return {
+        "total_w": trace.total_w, "u_total": trace.u_total, "fs": trace.fs,
+        "roof_calc": trace_rows(trace.roof), "floor_calcs": [trace_rows(terms) for terms in trace.floors],
+        "u_rows": trace_rows(trace.uplift),
+    }
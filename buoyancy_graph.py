@@ -0,0 +1,115 @@
+"""부재별 하중을 캐시하고 변경된 입력의 하위 노드만 다시 계산하는 의존성 그래프"""
+from collections import defaultdict
+
+from buoyancy_engine import (
+    FLOOR_FIELDS, SCALAR_FIELDS, base_weight, beam_weight, column_weight, flat_inputs, floor_load_bot, floor_load_mid, roof_load,
+    uplift_parts,
+)
+
+_MISSING = object()
+
+
+class CalcGraph:
+    """입력 노드와 파생 노드로 구성된 지연 계산 그래프
+
+    set/update로 입력 값이 바뀌면 그 입력에 의존하는 파생 노드만 무효화하고,
+    값은 get으로 요청될 때 다시 계산한다. recomputed는 파생 노드 재계산 횟수.
+    """
+
+    def __init__(self):
+        self._funcs = {}
+        self._deps = {}
+        self._dependents = defaultdict(list)
+        self._values = {}
+        self.recomputed = 0
+
+    def add_input(self, name, value=None):
+        self._deps[name] = ()
+        if value is not None: self._values[name] = value
+
+    def add_node(self, name, deps, func):
+        self._funcs[name] = func
+        self._deps[name] = tuple(deps)
+        for dep in deps: self._dependents[dep].append(name)
+
+    def set(self, name, value):
+        if name in self._values and self._values[name] == value: return
+        self._values[name] = value
+        self._invalidate(name)
+
+    def update(self, values):
+        for name, value in values.items():
+            if name in self._deps: self.set(name, value)
+
+    def _invalidate(self, name):
+        stack = list(self._dependents[name])
+        while stack:
+            node = stack.pop()
+            # 캐시가 없던 노드의 하위 노드는 이미 무효화된 상태
+            if self._values.pop(node, _MISSING) is not _MISSING:
+                stack.extend(self._dependents[node])
+
+    def get(self, name):
+        if name not in self._values:
+            args = [self.get(dep) for dep in self._deps[name]]
+            self._values[name] = self._funcs[name](*args)
+            self.recomputed += 1
+        return self._values[name]
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+
+def _m(done): return 1.0 if done else 0.0
+
+
+def build_graph(num_floors, inputs=None):
+    """단일 베이 부력 검토 그래프, 입력 노드 이름은 flat_inputs 규칙({name}_{i})을 따른다
+
+    파생 노드: 부재별 하중 (w_roof_*, w_col_i, w_slab_i, w_b1_i ..., w_base),
+    total_w, u_total, fs
+    """
+    g = CalcGraph()
+    for name in SCALAR_FIELDS: g.add_input(name)
+    for name in FLOOR_FIELDS:
+        for i in range(num_floors): g.add_input(f"{name}_{i}")
+
+    g.add_node("area", ["x_dist", "y_dist"], lambda x, y: (x * y) / 10**6)
+    g.add_node("fa", ["fw", "flv"], lambda w, l: (w * l) / 10**6)
+    g.add_node("m_r", ["roof_done"], _m)
+    g.add_node("roof_load", ["unit_c", "t_topping", "t_plain_r", "t_slab_r", "l_cl_r", "unit_topping", "unit_plain"], roof_load)
+    g.add_node("floor_load_mid", ["unit_c", "t_slab_mid", "l_cl_f"], floor_load_mid)
+    g.add_node("floor_load_bot", ["unit_c", "t_plain_bot", "t_slab_bot", "unit_plain"], floor_load_bot)
+
+    members = ["w_roof_slab", "w_roof_b1", "w_roof_g1", "w_roof_g2"]
+    g.add_node("w_roof_slab", ["roof_load", "area", "m_r"], lambda load, area, m: load * area * m)
+    for node, span in (("b1", "x_dist"), ("g1", "y_dist"), ("g2", "x_dist")):
+        g.add_node(f"w_roof_{node}", ["unit_c", f"bw_r{node}", f"bh_r{node}", "t_slab_r", span, "m_r"],
+                   lambda uc, w, h, t, l, m: beam_weight(uc, w, h, t, l / 1000, m))
+
+    for i in range(num_floors):
+        g.add_node(f"m_{i}", [f"done_{i}"], _m)
+        g.add_node(f"w_col_{i}", ["unit_c", f"bw_c_{i}", f"bh_c_{i}", f"h_{i}", f"m_{i}"], column_weight)
+        members.append(f"w_col_{i}")
+        if i == num_floors - 1:
+            g.add_node(f"w_slab_{i}", ["floor_load_bot", "area", "fa", f"m_{i}"], lambda fl, area, fa, m: fl * (area - fa) * m)
+            g.add_node("w_base", ["floor_load_bot", "unit_c", "fd", "t_slab_bot", "fa"], base_weight)
+            members += [f"w_slab_{i}", "w_base"]
+        else:
+            g.add_node(f"w_slab_{i}", ["floor_load_mid", "area", f"m_{i}"], lambda fl, area, m: fl * area * m)
+            members.append(f"w_slab_{i}")
+            for node, span in (("b1", "x_dist"), ("g1", "y_dist"), ("g2", "x_dist")):
+                g.add_node(f"w_{node}_{i}", ["unit_c", f"bw_{node}_{i}", f"bh_{node}_{i}", "t_slab_mid", span, f"m_{i}"],
+                           lambda uc, w, h, t, l, m: beam_weight(uc, w, h, t, l / 1000, m))
+                members.append(f"w_{node}_{i}")
+
+    g.add_node("total_w", members, lambda *weights: sum(weights))
+    g.add_node("ht", ["h_soil"] + [f"h_{i}" for i in range(num_floors)], lambda *hs: sum(hs) / 1000)
+    g.add_node("u_total", ["ht", "gl_minus", "t_slab_bot", "fd", "area", "fa"],
+               lambda ht, gl, tb, fd, area, fa: sum(uplift_parts(ht - gl, tb, fd, area, fa)))
+    g.add_node("fs", ["total_w", "u_total"], lambda w, u: w / u if u > 0 else 0)
+    g.members = members
+    g.num_floors = num_floors
+
+    if inputs is not None: g.update(flat_inputs(inputs))
+    return g
@@ -0,0 +1,106 @@
+"""건물 전체 베이 격자 모델 (열 단위 배열 저장, 변경 베이만 재계산)
+
+베이는 X방향 스팬 열과 Y방향 스팬 행이 만드는 직교 격자이며 베이 번호는
+row * nx + col 이다. 입력은 필드별 (N,) 또는 (N, F) 배열로 보관하고 evaluate는
+변경 표시된 베이만 모아 엔진의 일괄 계산으로 다시 구한다. 좌표 질의는 격자선
+좌표 배열의 이진 탐색으로 처리한다.
+"""
+import numpy as np
+
+from buoyancy_engine import FLOOR_FIELDS, SCALAR_FIELDS, evaluate
+
+BOOL_FIELDS = ("roof_done", "done")
+
+
+class BayGrid:
+    def __init__(self, x_spans, y_spans, base_inputs):
+        # 스팬은 입력값 그대로 보관 (격자선 좌표의 누적합/차분은 반올림 오차가 생김)
+        self.x_spans = np.array(x_spans, dtype=float); self.y_spans = np.array(y_spans, dtype=float)
+        self.x_edges = np.concatenate([[0.0], np.cumsum(self.x_spans)])
+        self.y_edges = np.concatenate([[0.0], np.cumsum(self.y_spans)])
+        self.nx = len(x_spans); self.ny = len(y_spans); self.size = self.nx * self.ny
+        self.num_floors = len(base_inputs["h"])
+        self.rows, self.cols = np.divmod(np.arange(self.size), self.nx)
+
+        self.data = {}
+        for name in SCALAR_FIELDS:
+            dtype = bool if name in BOOL_FIELDS else float
+            self.data[name] = np.full(self.size, base_inputs[name], dtype=dtype)
+        for name in FLOOR_FIELDS:
+            dtype = bool if name in BOOL_FIELDS else float
+            self.data[name] = np.tile(np.asarray(base_inputs[name], dtype=dtype), (self.size, 1))
+        self.data["x_dist"] = self.x_spans[self.cols]
+        self.data["y_dist"] = self.y_spans[self.rows]
+
+        self.total_w = np.zeros(self.size); self.u_total = np.zeros(self.size); self.fs = np.zeros(self.size)
+        self.ok = np.zeros(self.size, dtype=bool)
+        self._dirty = np.ones(self.size, dtype=bool)
+        self.recomputed = 0
+
+    # 공간 질의 -------------------------------------------------------
+    def bay_index(self, row, col):
+        return np.asarray(row) * self.nx + np.asarray(col)
+
+    def bay_at(self, x, y):
+        """좌표 (mm)를 포함하는 베이 번호, 건물 밖이면 -1"""
+        col = np.searchsorted(self.x_edges, x, side="right") - 1
+        row = np.searchsorted(self.y_edges, y, side="right") - 1
+        inside = (col >= 0) & (col < self.nx) & (row >= 0) & (row < self.ny)
+        return np.where(inside, row * self.nx + col, -1)
+
+    def bays_in(self, x_min, y_min, x_max, y_max):
+        """사각 영역 (mm)과 겹치는 베이 번호 배열"""
+        c0 = max(np.searchsorted(self.x_edges, x_min, side="right") - 1, 0)
+        c1 = min(np.searchsorted(self.x_edges, x_max, side="left"), self.nx)
+        r0 = max(np.searchsorted(self.y_edges, y_min, side="right") - 1, 0)
+        r1 = min(np.searchsorted(self.y_edges, y_max, side="left"), self.ny)
+        if c0 >= c1 or r0 >= r1: return np.empty(0, dtype=int)
+        rows, cols = np.meshgrid(np.arange(r0, r1), np.arange(c0, c1), indexing="ij")
+        return (rows * self.nx + cols).ravel()
+
+    # 입력 변경 -------------------------------------------------------
+    def update(self, bays, **values):
+        """지정 베이의 입력 변경, 값이 실제로 바뀐 베이만 재계산 대상으로 표시"""
+        bays = np.atleast_1d(np.asarray(bays, dtype=int))
+        for name, value in values.items():
+            if name in ("x_dist", "y_dist"):
+                raise ValueError("스팬은 set_span으로 변경합니다")
+            column = self.data[name]
+            new = np.broadcast_to(np.asarray(value, dtype=column.dtype), column[bays].shape)
+            changed = column[bays] != new
+            if changed.ndim > 1: changed = changed.any(axis=-1)
+            column[bays] = new
+            self._dirty[bays[changed]] = True
+
+    def update_region(self, x_min, y_min, x_max, y_max, **values):
+        bays = self.bays_in(x_min, y_min, x_max, y_max)
+        self.update(bays, **values)
+        return bays
+
+    def set_span(self, axis, index, span):
+        """X(axis='x') 열 또는 Y(axis='y') 행 하나의 스팬 변경, 해당 열/행 베이만 재계산"""
+        spans, edges = (self.x_spans, self.x_edges) if axis == "x" else (self.y_spans, self.y_edges)
+        spans[index] = span
+        edges[1:] = np.cumsum(spans)
+        if axis == "x":
+            bays = np.flatnonzero(self.cols == index); self.data["x_dist"][bays] = span
+        else:
+            bays = np.flatnonzero(self.rows == index); self.data["y_dist"][bays] = span
+        self._dirty[bays] = True
+
+    # 계산 -----------------------------------------------------------
+    def evaluate(self):
+        """변경된 베이만 일괄 재계산하고 (total_w, u_total, fs, ok) 전체 배열 반환"""
+        idx = np.flatnonzero(self._dirty)
+        if idx.size:
+            res = evaluate({name: column[idx] for name, column in self.data.items()})
+            self.total_w[idx] = res.total_w; self.u_total[idx] = res.u_total
+            self.fs[idx] = res.fs; self.ok[idx] = res.ok
+            self._dirty[idx] = False
+            self.recomputed += idx.size
+        return self.total_w, self.u_total, self.fs, self.ok
+
+    def fs_grid(self):
+        """(ny, nx) FS 격자 (행 0이 Y 원점 쪽)"""
+        self.evaluate()
+        return self.fs.reshape(self.ny, self.nx)
@@ -0,0 +1,209 @@
+"""시나리오 라이브러리 (SQLite 저장, 색인 검색, 일괄 재계산, 비교)
+
+시나리오 한 건은 (프로젝트, 베이, 시공단계, 이름)과 검토 결과 열, 그리고 전체 입력
+(flat_inputs)을 담은 JSON으로 저장하므로 앱 기본값이 바뀌어도 저장된 시나리오의
+의미는 바뀌지 않는다. 프로젝트/베이/시공단계, FS, 판정+지하수위에
+색인을 두어 "GL-3m보다 수위가 높은 NG 단계" 같은 조회가 전체를 읽지 않고 끝난다.
+조회와 재계산은 커서를 순회하거나 id 구간 단위로 읽으므로 메모리 사용량이 건수와 무관하다.
+
+사용 예:
+    lib = ScenarioLibrary("scenarios.db")
+    lib.save_stages("A동", "X1-Y1", inputs)
+    for row in lib.query(ok=False, gwl_above=3.0): ...
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from buoyancy_batch import evaluate_frame, input_columns
+from buoyancy_engine import construction_stages, default_inputs, evaluate, flat_inputs, nested_inputs, with_stages
+
+ScenarioRow = namedtuple("ScenarioRow", ["id", "project", "bay", "stage", "name", "num_floors", "gl_minus", "fs", "ok", "saved"])
+ROW_COLUMNS = ", ".join(ScenarioRow._fields)
+RESULT_FIELDS = ("total_w", "u_total", "fs", "ok")
+INSERT_SQL = ("INSERT INTO scenarios (project, bay, stage, name, num_floors, gl_minus, target_fs, total_w, u_total, fs, ok, inputs, saved) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL, bay TEXT NOT NULL, stage TEXT NOT NULL, name TEXT NOT NULL DEFAULT '',
+    num_floors INTEGER NOT NULL, gl_minus REAL, target_fs REAL,
+    total_w REAL, u_total REAL, fs REAL, ok INTEGER,
+    inputs TEXT NOT NULL, saved REAL
+);
+CREATE INDEX IF NOT EXISTS ix_scenarios_location ON scenarios (project, bay, stage);
+CREATE INDEX IF NOT EXISTS ix_scenarios_fs ON scenarios (fs);
+CREATE INDEX IF NOT EXISTS ix_scenarios_ok_gwl ON scenarios (ok, gl_minus);
+"""
+# 1: 기본값과 다른 입력만 저장, 2: 전체 입력 저장 (PRAGMA user_version)
+FORMAT_VERSION = 2
+
+
+def _plain(value):
+    if isinstance(value, (bool, np.bool_)): return bool(value)
+    if isinstance(value, (np.integer, np.floating)): return value.item()
+    return value
+
+
+def _dumps(flat):
+    return json.dumps({k: _plain(v) for k, v in flat.items()}, ensure_ascii=False, separators=(",", ":"))
+
+
+def stage_label(inputs):
+    """시공 완료 여부가 순타 시공단계 중 하나와 같으면 그 이름, 아니면 '사용자 정의'"""
+    stages = construction_stages(len(inputs["h"]))
+    done = np.asarray(inputs["done"], dtype=bool)
+    for name, stage_done, roof_done in zip(stages.names, stages.done, stages.roof_done):
+        if np.array_equal(done, stage_done) and bool(inputs["roof_done"]) == roof_done: return name
+    return "사용자 정의"
+
+
+def full_flat(num_floors, stored):
+    """저장된 입력의 flat 형식 (시공 완료 여부만 bool, 치수는 저장값 그대로)
+
+    저장 이후에 새로 생긴 입력 항목만 앱 기본값으로 채운다.
+    """
+    flat = flat_inputs(default_inputs(num_floors))
+    for name, value in stored.items():
+        if name in flat: flat[name] = bool(value) if isinstance(flat[name], bool) else value
+    return flat
+
+
+class ScenarioLibrary:
+    def __init__(self, path="scenarios.db"):
+        self.path = path
+        self._local = threading.local()
+        self._db().executescript(SCHEMA)
+        self._upgrade()
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _upgrade(self):
+        """형식 1 (기본값과 다른 입력만 저장)을 전체 입력으로 변환
+
+        형식 1의 기준 기본값은 형식 2 도입 시점의 기본값과 같으므로 지금 펼쳐 두면
+        이후 기본값이 바뀌어도 저장된 시나리오가 바뀌지 않는다.
+        """
+        conn = self._db()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > FORMAT_VERSION:
+            raise RuntimeError(f"{self.path}: 지원하지 않는 라이브러리 형식 {version} (이 버전은 {FORMAT_VERSION}까지 읽음)")
+        if version == FORMAT_VERSION: return
+        with conn:
+            rows = conn.execute("SELECT id, num_floors, inputs FROM scenarios").fetchall()
+            conn.executemany("UPDATE scenarios SET inputs = ? WHERE id = ?",
+                             ((_dumps(full_flat(nf, json.loads(stored))), sid) for sid, nf, stored in rows))
+            conn.execute(f"PRAGMA user_version = {FORMAT_VERSION}")
+
+    # 저장/불러오기 -----------------------------------------------------
+    def _row(self, project, bay, stage, name, inputs, total_w, u_total, fs, ok):
+        num_f = len(inputs["h"])
+        return (project, bay, stage, name, num_f, float(inputs["gl_minus"]), float(inputs["target_fs"]),
+                float(total_w), float(u_total), float(fs), int(bool(ok)), _dumps(flat_inputs(inputs)), time.time())
+
+    def save(self, project, bay, inputs, stage=None, name=""):
+        """입력 하나를 계산해 저장하고 id 반환 (stage를 생략하면 시공 완료 여부로 판별)"""
+        res = evaluate(inputs)
+        row = self._row(project, bay, stage or stage_label(inputs), name, inputs, *(np.asarray(v).item() for v in res))
+        with self._db() as conn:
+            return conn.execute(INSERT_SQL, row).lastrowid
+
+    def save_stages(self, project, bay, inputs, name=""):
+        """순타 시공단계마다 한 건씩 저장 (단계 축 일괄 계산), 저장 건수 반환"""
+        stages = construction_stages(len(inputs["h"]))
+        res = evaluate(with_stages(inputs, stages))
+        rows = []
+        for k, stage in enumerate(stages.names):
+            staged = dict(inputs, done=stages.done[k].tolist(), roof_done=bool(stages.roof_done[k]))
+            rows.append(self._row(project, bay, stage, name, staged, *(v[k] for v in res)))
+        with self._db() as conn:
+            conn.executemany(INSERT_SQL, rows)
+        return len(rows)
+
+    def load(self, scenario_id):
+        """저장된 시나리오의 계산 입력 (층 입력은 리스트)"""
+        row = self._db().execute("SELECT num_floors, inputs FROM scenarios WHERE id = ?", (scenario_id,)).fetchone()
+        if row is None: raise KeyError(scenario_id)
+        num_f, stored = row
+        inputs = nested_inputs(full_flat(num_f, json.loads(stored)), num_f)
+        return {k: (v.tolist() if isinstance(v, np.ndarray) else v) for k, v in inputs.items()}
+
+    def delete(self, scenario_id):
+        with self._db() as conn: conn.execute("DELETE FROM scenarios WHERE id = ?", (scenario_id,))
+
+    # 조회 -------------------------------------------------------------
+    def _where(self, project=None, bay=None, stage=None, ok=None, fs_below=None, gwl_above=None):
+        """gwl_above=3.0은 지하수위가 GL-3m보다 높은 (gl_minus < 3.0) 시나리오"""
+        clauses, params = [], []
+        for column, value in (("project", project), ("bay", bay), ("stage", stage)):
+            if value is not None: clauses.append(f"{column} = ?"); params.append(value)
+        if ok is not None: clauses.append("ok = ?"); params.append(int(bool(ok)))
+        if fs_below is not None: clauses.append("fs < ?"); params.append(fs_below)
+        if gwl_above is not None: clauses.append("gl_minus < ?"); params.append(gwl_above)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, order="fs", limit=None, **filters):
+        """조건에 맞는 시나리오 요약 행을 순서대로 (커서 순회, 입력 JSON은 읽지 않음)"""
+        where, params = self._where(**filters)
+        sql = f"SELECT {ROW_COLUMNS} FROM scenarios{where} ORDER BY {'fs' if order == 'fs' else 'id DESC'}"
+        if limit: sql += f" LIMIT {int(limit)}"
+        for row in self._db().execute(sql, params): yield ScenarioRow(*row)
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self._db().execute(f"SELECT COUNT(*) FROM scenarios{where}", params).fetchone()[0]
+
+    def projects(self):
+        return [r[0] for r in self._db().execute("SELECT DISTINCT project FROM scenarios ORDER BY project")]
+
+    # 일괄 재계산 / 비교 ------------------------------------------------
+    def reevaluate(self, chunk_size=5000, **filters):
+        """저장된 입력으로 결과 열을 다시 계산 (id 구간 단위), (재계산 건수, 판정이 바뀐 건수) 반환"""
+        where, params = self._where(**filters)
+        where = (where + " AND" if where else " WHERE") + " id > ?"
+        last_id = 0; updated = flipped = 0
+        while True:
+            rows = self._db().execute(
+                f"SELECT id, num_floors, inputs, ok FROM scenarios{where} ORDER BY id LIMIT ?", params + [last_id, chunk_size]).fetchall()
+            if not rows: break
+            frame = pd.DataFrame([dict(full_flat(nf, json.loads(stored)), num_floors=nf) for _, nf, stored, _ in rows],
+                                 index=[r[0] for r in rows])
+            out = evaluate_frame(frame)
+            ok = (out["result"] == "OK").to_numpy()
+            flipped += int((ok != np.array([bool(r[3]) for r in rows])).sum())
+            with self._db() as conn:
+                conn.executemany("UPDATE scenarios SET total_w = ?, u_total = ?, fs = ?, ok = ? WHERE id = ?",
+                                 zip(out["total_w"].tolist(), out["u_total"].tolist(), out["fs"].tolist(), ok.astype(int).tolist(), out.index.tolist()))
+            updated += len(rows); last_id = rows[-1][0]
+        return updated, flipped
+
+    def diff(self, id_a, id_b):
+        """두 시나리오의 다른 입력/결과 [(항목, A 값, B 값)] (두 건만 읽음)"""
+        rows = {}
+        for sid in (id_a, id_b):
+            row = self._db().execute("SELECT num_floors, inputs, total_w, u_total, fs, ok FROM scenarios WHERE id = ?", (sid,)).fetchone()
+            if row is None: raise KeyError(sid)
+            values = full_flat(row[0], json.loads(row[1]))
+            values.update(num_floors=row[0], **dict(zip(RESULT_FIELDS, row[2:]))); values["ok"] = bool(values["ok"])
+            rows[sid] = values
+        a, b = rows[id_a], rows[id_b]
+        names = ["num_floors"] + [n for n in input_columns(max(a["num_floors"], b["num_floors"]))] + list(RESULT_FIELDS)
+        return [(n, a.get(n), b.get(n)) for n in names if a.get(n) != b.get(n)]
+
+    def compare(self, project_a, project_b, changed_only=True):
+        """두 프로젝트의 같은 베이/시공단계 FS 대조 (색인 조인, 커서 순회)"""
+        sql = ("SELECT a.bay, a.stage, a.fs, b.fs, a.ok, b.ok FROM scenarios a JOIN scenarios b "
+               "ON b.project = ? AND b.bay = a.bay AND b.stage = a.stage WHERE a.project = ?")
+        if changed_only: sql += " AND a.ok != b.ok"
+        yield from self._db().execute(sql + " ORDER BY a.bay, a.stage", (project_b, project_a))
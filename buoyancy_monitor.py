@@ -0,0 +1,282 @@
+"""지하수위 계측 실시간 감시 (asyncio)
+
+간극수압계(피에조미터) 계측값을 CSV 파일 꼬리 읽기, 로컬 소켓 또는 모의 발생기로
+받아 현재 시공단계의 FS를 계측값마다 다시 구한다. 시공단계의 ΣW와 부력의 수위
+계수는 단계가 바뀔 때만 계산하고, 계측값 하나는 스칼라 연산 몇 번으로 처리한다.
+
+계측값 형식 (CSV 행 또는 소켓 한 줄): sensor,gl_minus[,timestamp]
+
+사용 예:
+    python buoyancy_monitor.py --csv piezometers.csv
+    python buoyancy_monitor.py --port 9500
+    python buoyancy_monitor.py --simulate 36 --rate 20
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+from buoyancy_engine import construction_stages, critical_gwl, default_inputs, evaluate, uplift, with_stages
+
+Reading = namedtuple("Reading", ["sensor", "gl_minus", "timestamp"])
+Alert = namedtuple("Alert", ["timestamp", "sensor", "level", "gl_minus", "fs", "message"])
+
+LEVELS = ("OK", "주의", "NG")
+
+
+def parse_reading(line):
+    """'sensor,gl_minus[,timestamp]' 한 줄 해석, 형식이 맞지 않으면 None"""
+    parts = line.strip().split(",")
+    if len(parts) < 2: return None
+    try:
+        gl = float(parts[1]); ts = float(parts[2]) if len(parts) > 2 and parts[2] else time.time()
+    except ValueError:
+        return None  # 머리글 행 등
+    return Reading(parts[0], gl, ts)
+
+
+class GroundwaterMonitor:
+    """계측값마다 현재 시공단계 FS 판정, 센서별 상태와 경보 기록
+
+    FS = ΣW / (u0 - slope x gl_minus) 이며 ΣW, u0, slope는 configure에서만 계산한다.
+    경보는 센서 상태가 바뀔 때만 기록한다 (warn_ratio: 목표 안전율 대비 주의 구간).
+    """
+
+    def __init__(self, inputs, stage=-1, warn_ratio=1.1, history=600):
+        self._lock = threading.Lock()
+        self.warn_ratio = warn_ratio
+        self.latest = {}
+        self.levels = {}
+        self.history = deque(maxlen=history)
+        self.alerts = deque(maxlen=200)
+        self.count = 0
+        self.busy_s = 0.0
+        self.configure(inputs, stage)
+
+    def configure(self, inputs, stage=-1):
+        """검토 입력 또는 시공단계 변경 (기존 센서 상태는 새 기준으로 다시 판정)"""
+        stages = construction_stages(len(inputs["h"]))
+        staged = with_stages(inputs, stages)
+        with self._lock:
+            self.stage_names = stages.names
+            self.stage = stage % len(stages.names)
+            self.target_fs = inputs["target_fs"]
+            self.total_w = float(evaluate(staged).total_w[self.stage])
+            self.gl_critical = float(critical_gwl(staged)[self.stage])
+            u0 = float(uplift(inputs, gl_minus=0.0))
+            self.u0 = u0; self.slope = u0 - float(uplift(inputs, gl_minus=1.0))
+            readings = list(self.latest.values())
+            self.latest.clear(); self.levels.clear()
+        for reading in readings: self.process(reading)
+
+    def fs_at(self, gl_minus):
+        """부력이 0 이하이면 엔진(safety_factor)과 같이 0을 반환"""
+        u = self.u0 - self.slope * gl_minus
+        return self.total_w / u if u > 0 else 0.0
+
+    def level(self, fs):
+        if fs < self.target_fs: return 2
+        return 1 if fs < self.target_fs * self.warn_ratio else 0
+
+    def process(self, reading):
+        """계측값 하나 반영, 상태가 바뀌면 Alert 반환"""
+        t0 = time.perf_counter()
+        fs = self.fs_at(reading.gl_minus)
+        level = self.level(fs)
+        alert = None
+        with self._lock:
+            self.latest[reading.sensor] = reading
+            prev = self.levels.get(reading.sensor, 0)
+            self.levels[reading.sensor] = level
+            governing = min(self.latest.values(), key=lambda r: r.gl_minus)
+            self.history.append((reading.timestamp, governing.gl_minus, self.fs_at(governing.gl_minus)))
+            if level != prev:
+                verb = "해제" if level < prev else "발생"
+                alert = Alert(reading.timestamp, reading.sensor, LEVELS[max(level, prev)], reading.gl_minus, fs,
+                              f"{reading.sensor} {LEVELS[max(level, prev)]} {verb}: GL-{reading.gl_minus:.2f} m, FS {fs:.3f}")
+                self.alerts.append(alert)
+            self.count += 1
+            self.busy_s += time.perf_counter() - t0
+        return alert
+
+    def snapshot(self):
+        """대시보드 표시용 현재 상태 (센서별 최신값, 지배 센서, 이력, 경보)"""
+        with self._lock:
+            sensors = [(r.sensor, r.gl_minus, self.fs_at(r.gl_minus), LEVELS[self.levels[r.sensor]], r.timestamp)
+                       for r in sorted(self.latest.values(), key=lambda r: r.sensor)]
+            return {
+                "stage": self.stage_names[self.stage], "target_fs": self.target_fs, "gl_critical": self.gl_critical,
+                "sensors": sensors, "governing": min(sensors, key=lambda s: s[2]) if sensors else None,
+                "history": list(self.history), "alerts": list(self.alerts)[::-1],
+                "count": self.count, "mean_us": self.busy_s / self.count * 1e6 if self.count else 0.0,
+            }
+
+    async def run(self, source, on_alert=None):
+        async for reading in source:
+            alert = self.process(reading)
+            if alert is not None and on_alert is not None: on_alert(alert)
+
+
+# 계측값 입력원 ---------------------------------------------------------
+async def tail_csv(path, poll=0.2, from_start=False):
+    """CSV 파일에 이어 써지는 행을 계속 읽는다 (tail -f)"""
+    with open(path, encoding="utf-8") as f:
+        if not from_start: f.seek(0, 2)
+        buf = ""
+        while True:
+            chunk = f.read()
+            if not chunk:
+                await asyncio.sleep(poll); continue
+            buf += chunk
+            *lines, buf = buf.split("\n")
+            for line in lines:
+                reading = parse_reading(line)
+                if reading is not None: yield reading
+
+
+async def socket_readings(host="127.0.0.1", port=9500, queue_size=10000):
+    """로컬 TCP 소켓으로 받은 줄 단위 계측값 (여러 계측기 동시 접속 가능)"""
+    queue = asyncio.Queue(queue_size)
+    writers = set()
+
+    async def handle(reader, writer):
+        writers.add(writer)
+        try:
+            while line := await reader.readline():
+                reading = parse_reading(line.decode("utf-8", "replace"))
+                if reading is not None: await queue.put(reading)
+        except ConnectionError:
+            pass
+        finally:
+            writers.discard(writer); writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        try:
+            while True: yield await queue.get()
+        finally:
+            # 접속 중인 계측기를 먼저 끊어야 서버가 닫히고 포트가 풀린다
+            for writer in list(writers): writer.close()
+
+
+async def simulate(sensors=24, rate=10.0, base_gl=2.35, spread=0.3, drift=0.02, tick=0.05, seed=None):
+    """모의 계측값 (센서별 임의 보행), 센서마다 초당 rate회를 tick 간격으로 몰아서 발생"""
+    rng = random.Random(seed)
+    names = [f"P-{i+1:02d}" for i in range(sensors)]
+    levels = {name: base_gl + rng.uniform(-spread, spread) for name in names}
+    carry = 0.0
+    while True:
+        carry += rate * sensors * tick
+        for _ in range(int(carry)):
+            name = rng.choice(names)
+            levels[name] = max(levels[name] + rng.gauss(0, drift), 0.0)
+            yield Reading(name, levels[name], time.time())
+        carry -= int(carry)
+        await asyncio.sleep(tick)
+
+
+class MonitorThread(threading.Thread):
+    """별도 스레드의 이벤트 루프에서 감시 실행 (Streamlit 스크립트와 분리)
+
+    lease(초)를 주면 그 시간 동안 touch()가 없을 때 스스로 멈춘다. 화면을 닫거나
+    새로 고쳐 정지 버튼을 누를 수 없게 된 감시가 소켓 포트를 계속 잡고 있지 않게 한다.
+    """
+
+    def __init__(self, monitor, source_factory, lease=None):
+        super().__init__(daemon=True)
+        self.monitor = monitor
+        self.source_factory = source_factory
+        self.lease = lease
+        self.error = None
+        self.expired = False
+        self._seen = time.monotonic()
+        self._loop = None
+        self._task = None
+        self._ready = threading.Event()
+
+    def touch(self):
+        self._seen = time.monotonic()
+
+    async def _main(self):
+        reader = asyncio.ensure_future(self.monitor.run(self.source_factory()))
+        try:
+            while not reader.done():
+                await asyncio.wait([reader], timeout=1.0)
+                if self.lease and time.monotonic() - self._seen > self.lease:
+                    self.expired = True; break
+            if reader.done(): reader.result()
+        finally:
+            # 입력원 (소켓 서버, 파일)까지 닫힌 뒤에 반환
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._main())
+        self._ready.set()
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:
+            self.error = exc
+        finally:
+            # 입력원이 닫으며 남긴 작업 (소켓 접속 처리)이 끝난 뒤 루프를 닫는다
+            pending = asyncio.all_tasks(self._loop)
+            if pending: self._loop.run_until_complete(asyncio.wait(pending, timeout=1.0))
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    def stop(self, timeout=2.0):
+        """감시 취소 후 입력원이 닫힐 때까지 최대 timeout초 대기"""
+        if not self.is_alive(): return
+        self._ready.wait(timeout)
+        try:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        except RuntimeError:
+            pass  # 이미 종료된 이벤트 루프
+        if threading.current_thread() is not self: self.join(timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="지하수위 계측 실시간 부력 감시")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="이어 써지는 계측 CSV 파일 (sensor,gl_minus[,timestamp])")
+    source.add_argument("--port", type=int, help="계측값을 받을 로컬 TCP 포트")
+    source.add_argument("--simulate", type=int, metavar="N", help="모의 센서 N개")
+    parser.add_argument("--rate", type=float, default=10.0, help="모의 센서당 초당 계측 횟수")
+    parser.add_argument("--num-floors", type=int, default=2, help="검토 층수 (기본 2)")
+    parser.add_argument("--stage", type=int, default=-1, help="시공단계 번호 (기본 마지막 단계)")
+    args = parser.parse_args(argv)
+
+    monitor = GroundwaterMonitor(default_inputs(args.num_floors), args.stage)
+    if args.csv: src = tail_csv(args.csv)
+    elif args.port: src = socket_readings(port=args.port)
+    else: src = simulate(args.simulate, args.rate)
+
+    async def report():
+        while True:
+            await asyncio.sleep(5)
+            snap = monitor.snapshot(); gov = snap["governing"]
+            if gov: print(f"[{snap['stage']}] 계측 {snap['count']:,}건, 평균 처리 {snap['mean_us']:.1f} us, 최소 FS {gov[2]:.3f} ({gov[0]})", file=sys.stderr)
+
+    async def run():
+        reporter = asyncio.create_task(report())
+        try:
+            await monitor.run(src, on_alert=lambda a: print(a.message, file=sys.stderr))
+        finally:
+            reporter.cancel()
+
+    print(f"시공단계 {monitor.stage_names[monitor.stage]}, 임계 수위 GL-{monitor.gl_critical:.3f} m", file=sys.stderr)
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""앱 실행 구간별 소요 시간, 최대 메모리, 전송 이미지 크기 측정 (선택 기능)
+
+환경 변수 BUOYANCY_PROFILE=1 또는 URL 쿼리 ?profile=1 로 켠다.
+BUOYANCY_PROFILE_LOG=<경로>를 지정하면 실행마다 결과를 JSON 한 줄로 이어 쓴다.
+최대 메모리는 tracemalloc 기준이며, 추적은 프로세스 전체에 걸리고 계산을 크게
+느리게 하므로 서버 운영자가 BUOYANCY_PROFILE을 지정한 경우에만 측정한다
+(쿼리로 켠 세션은 시간만 측정). 여러 세션이 동시에 실행 중이면 함께 집계된다.
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class RunProfiler:
+    """한 번의 실행(전체 재실행 또는 fragment 재실행) 동안의 구간 기록"""
+
+    def __init__(self, enabled=False, log_path=None, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.log_path = log_path
+        self.running = False
+        self.kind = None
+        self.sections = []
+        self.counters = {}
+        self.peak_bytes = None
+        self.history = []
+        self._t0 = 0.0
+
+    def begin(self, kind):
+        if not self.enabled: return
+        if self.trace_memory:
+            if not tracemalloc.is_tracing(): tracemalloc.start()
+            tracemalloc.reset_peak()
+        self.running = True; self.kind = kind
+        self.sections = []; self.counters = {}
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def section(self, label):
+        if not self.enabled:
+            yield; return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append((label, time.perf_counter() - t0))
+
+    def add(self, counter, value):
+        if self.enabled: self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def end(self):
+        """실행 종료, 결과를 기록에 추가하고 로그 파일에 이어 쓴다"""
+        if not (self.enabled and self.running): return None
+        self.running = False
+        self.peak_bytes = tracemalloc.get_traced_memory()[1] if self.trace_memory and tracemalloc.is_tracing() else None
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"), "kind": self.kind,
+            "total_ms": (time.perf_counter() - self._t0) * 1000,
+            "sections_ms": {label: dt * 1000 for label, dt in self.sections},
+            "peak_mb": None if self.peak_bytes is None else self.peak_bytes / 2**20, **self.counters,
+        }
+        self.history = (self.history + [record])[-20:]
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+
+def profiling_enabled_by_env():
+    return os.environ.get("BUOYANCY_PROFILE", "") not in ("", "0")
+
+
+def profiling_requested(query_params):
+    return profiling_enabled_by_env() or query_params.get("profile") == "1"
+
+
+def get_profiler(session_state, query_params):
+    """세션별 프로파일러 (요청이 없으면 모든 기록이 무동작)"""
+    enabled = profiling_requested(query_params)
+    profiler = session_state.get("_profiler")
+    if profiler is None or profiler.enabled != enabled:
+        profiler = session_state["_profiler"] = RunProfiler(enabled, os.environ.get("BUOYANCY_PROFILE_LOG") or None, profiling_enabled_by_env())
+    return profiler
@@ -0,0 +1,121 @@
+"""몬테카를로 부력 신뢰성 검토 (입력 분포 표본의 일괄 계산, 청크 단위로 메모리 제한)
+
+입력 중 분포를 지정한 항목만 표본을 뽑고 나머지는 확정값으로 둔다. 부재별 하중
+기여분과 부력은 시공단계와 무관하므로 청크마다 한 번만 계산하고, 시공단계 축은
+완료 여부 행렬과의 곱으로 붙인다. 파괴확률과 민감도(입력-FS 상관계수)는 청크별
+누적합으로 구하므로 표본 수와 무관하게 메모리 사용량이 chunk_size에 비례한다.
+"""
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+
+from buoyancy_engine import FLOOR_FIELDS, construction_stages, contributions, safety_factor, uplift
+
+# kind: "normal" (loc=평균, scale=표준편차), "lognormal" (loc=평균, scale=표준편차), "uniform" (loc=하한, scale=상한)
+# 층 입력은 loc/scale을 (F,) 배열로 줄 수 있으며 층마다 독립 표본을 뽑는다.
+Dist = namedtuple("Dist", ["kind", "loc", "scale"])
+
+ReliabilityResult = namedtuple("ReliabilityResult", [
+    "stages", "samples", "target_fs", "p_fail", "p_fail_se", "beta", "fs_mean", "fs_std", "variables", "sensitivity",
+])
+
+
+def around(nominal, sd=None, cov=None, kind="normal"):
+    """공칭값 중심 분포 (표준편차 sd 또는 변동계수 cov)
+
+    균등분포는 평균과 표준편차가 같은 구간 (nominal ± √3·sd)으로 바꾼다.
+    """
+    nominal = np.asarray(nominal, dtype=float)
+    sd = nominal * cov if sd is None else np.full_like(nominal, sd)
+    if kind == "uniform": return Dist(kind, nominal - np.sqrt(3) * sd, nominal + np.sqrt(3) * sd)
+    return Dist(kind, nominal, sd)
+
+
+def default_distributions(inputs, gl_sd=0.5, unit_cov=0.04, size_sd=5.0):
+    """단위중량 (변동계수), 지하수위 (표준편차 m), 슬래브 두께와 부재 단면 (표준편차 mm)의 기본 분포"""
+    dists = {name: around(inputs[name], cov=unit_cov) for name in ("unit_c", "unit_topping", "unit_plain")}
+    dists["gl_minus"] = around(inputs["gl_minus"], sd=gl_sd)
+    for name in ("t_topping", "t_slab_r", "t_slab_mid", "t_slab_bot", "fd"):
+        dists[name] = around(inputs[name], sd=size_sd)
+    for name in FLOOR_FIELDS:
+        if name.startswith("b"): dists[name] = around(inputs[name], sd=size_sd)
+    return dists
+
+
+def _standard(dist, rng, out):
+    """표준 표본 (정규분포는 N(0,1), 균등분포는 U(0,1)) 을 float32로 out에 채운다"""
+    if dist.kind == "uniform": rng.random(out=out, dtype=np.float32)
+    elif dist.kind in ("normal", "lognormal"): rng.standard_normal(out=out, dtype=np.float32)
+    else: raise ValueError(f"지원하지 않는 분포: {dist.kind}")
+
+
+def transform(dist, z):
+    """표준 표본을 입력값으로 변환"""
+    if dist.kind == "normal": return dist.loc + dist.scale * z
+    if dist.kind == "uniform": return dist.loc + (dist.scale - dist.loc) * z
+    sigma2 = np.log1p((np.asarray(dist.scale) / dist.loc) ** 2)
+    return np.exp(np.log(dist.loc) - sigma2 / 2 + np.sqrt(sigma2) * z)
+
+
+def monte_carlo(inputs, distributions, n_samples=1_000_000, stages=None, target_fs=None, chunk_size=50_000, seed=None):
+    """시공단계별 파괴확률 P(FS < target_fs), 신뢰도 지수, FS 평균/표준편차와 민감도
+
+    sensitivity는 (S, V) 배열로 각 확률 입력 (variables, 층 입력은 {name}_{i})의
+    표준 표본과 FS 사이의 상관계수이며 절댓값이 클수록 해당 단계의 FS를 좌우한다.
+    정규/균등분포는 입력값과의 상관계수와 같고 대수정규분포는 ln(입력)과의 상관계수다.
+    """
+    num_f = len(inputs["h"])
+    stages = construction_stages(num_f) if stages is None else stages
+    m_f = np.asarray(stages.done, dtype=float); m_r = np.asarray(stages.roof_done, dtype=float)
+    target = inputs["target_fs"] if target_fs is None else target_fs
+    rng = np.random.default_rng(seed)
+
+    variables = []; slots = {}
+    for name in distributions:
+        start = len(variables)
+        variables += [f"{name}_{i}" for i in range(num_f)] if name in FLOOR_FIELDS else [name]
+        slots[name] = slice(start, len(variables))
+    num_s = len(stages.names); num_v = len(variables)
+    fails = np.zeros(num_s); s_y = np.zeros(num_s); s_yy = np.zeros(num_s)
+    s_x = np.zeros(num_v); s_xx = np.zeros(num_v); s_xy = np.zeros((num_s, num_v))
+    z_buf = np.empty((num_v, min(chunk_size, n_samples)), dtype=np.float32)
+
+    done = 0
+    while done < n_samples:
+        n = min(chunk_size, n_samples - done)
+        z = z_buf[:, :n]; drawn = dict(inputs)
+        for name, dist in distributions.items():
+            zs = z[slots[name]]
+            for row in zs: _standard(dist, rng, row)
+            drawn[name] = transform(dist, zs.T if name in FLOOR_FIELDS else zs[0])
+        c = contributions(drawn)
+        total_w = c.base[:, None] + c.roof[:, None] * m_r + c.floors @ m_f.T
+        fs = safety_factor(total_w, uplift(drawn)[:, None])
+
+        fails += (fs < target).sum(axis=0)
+        s_y += fs.sum(axis=0); s_yy += np.einsum("ns,ns->s", fs, fs)
+        if num_v:
+            z64 = z.astype(float)
+            s_x += z64.sum(axis=1); s_xx += np.einsum("vn,vn->v", z64, z64); s_xy += fs.T @ z64.T
+        done += n
+
+    p_fail = fails / n_samples
+    fs_mean = s_y / n_samples; fs_var = np.maximum(s_yy / n_samples - fs_mean**2, 0.0)
+    x_mean = s_x / n_samples; x_var = np.maximum(s_xx / n_samples - x_mean**2, 0.0)
+    cov_xy = s_xy / n_samples - fs_mean[:, None] * x_mean
+    denom = np.sqrt(fs_var[:, None] * x_var)
+    sensitivity = np.divide(cov_xy, denom, out=np.zeros_like(cov_xy), where=denom > 0)
+    normal = NormalDist()
+    beta = np.array([normal.inv_cdf(1 - p) if 0 < p < 1 else (np.inf if p == 0 else -np.inf) for p in p_fail])
+    return ReliabilityResult(
+        stages.names, n_samples, target, p_fail, np.sqrt(p_fail * (1 - p_fail) / n_samples), beta,
+        fs_mean, np.sqrt(fs_var), variables, sensitivity,
+    )
+
+
+def ranking(result, stage, top=None):
+    """한 시공단계의 민감도 순위 [(입력, 상관계수), ...] (절댓값 내림차순)"""
+    k = result.stages.index(stage) if isinstance(stage, str) else stage
+    order = np.argsort(-np.abs(result.sensitivity[k]))[:top]
+    return [(result.variables[j], float(result.sensitivity[k, j])) for j in order]
@@ -0,0 +1,138 @@
+"""부력 검토 엑셀 계산서 출력 (xlsxwriter)
+
+write_report는 시나리오(베이/시공단계)마다 시트 하나에 검토 결과, 상세 산식 표와
+층고 단면도를 기록한다. 파일 경로로 출력하면 constant_memory 모드로 행을 순서대로
+흘려 써서 메모리 사용량이 시트 크기와 무관하다. BatchSheetWriter는 일괄 실행 결과를
+한 시트에 스트리밍으로 기록한다.
+"""
+import io
+import re
+from datetime import datetime
+
+import xlsxwriter
+
+from buoyancy_drawing import section_png
+from buoyancy_engine import calc_trace, term_expr, term_label
+
+DETAIL_COLUMNS = ["부재명", "상세 산식", "하중(kN)"]
+U_COLUMNS = ["구분", "상세 산식", "결과(kN)"]
+EXCEL_MAX_ROWS = 1048576
+
+
+def _formats(workbook):
+    return {
+        "title": workbook.add_format({"bold": True, "font_size": 14}),
+        "head": workbook.add_format({"bold": True, "font_color": "white", "bg_color": "#4A5568", "border": 1}),
+        "section": workbook.add_format({"bold": True, "bottom": 2}),
+        "text": workbook.add_format({"border": 1}),
+        "num": workbook.add_format({"border": 1, "num_format": "#,##0.00"}),
+        "fs": workbook.add_format({"border": 1, "num_format": "0.0000"}),
+        "ok": workbook.add_format({"bold": True, "border": 1, "font_color": "white", "bg_color": "#1976d2", "align": "center"}),
+        "ng": workbook.add_format({"bold": True, "border": 1, "font_color": "white", "bg_color": "#d32f2f", "align": "center"}),
+    }
+
+
+def sheet_name(name, used):
+    """엑셀 시트 이름 규칙 (31자, 금지 문자 제외, 중복 방지)"""
+    base = re.sub(r"[\[\]:*?/\\]", "_", str(name))[:31] or "Sheet"
+    candidate, n = base, 1
+    while candidate.lower() in used:
+        n += 1; suffix = f"~{n}"
+        candidate = base[:31 - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def _write_table(ws, fmts, row, title, columns, terms):
+    ws.write(row, 0, title, fmts["section"]); row += 1
+    for c, col in enumerate(columns): ws.write(row, c, col, fmts["head"])
+    row += 1
+    for term in terms:
+        ws.write(row, 0, term_label(term), fmts["text"]); ws.write(row, 1, term_expr(term), fmts["text"])
+        ws.write_number(row, 2, term.value, fmts["num"])
+        row += 1
+    return row + 1
+
+
+def write_scenario_sheet(workbook, fmts, name, inputs, with_drawing=True):
+    """시나리오 하나의 계산서 시트 (행을 위에서 아래로 한 번만 기록)"""
+    trace = calc_trace(inputs)
+    ws = workbook.add_worksheet(name)
+    ws.set_column(0, 0, 22); ws.set_column(1, 1, 62); ws.set_column(2, 2, 14)
+
+    ws.write(0, 0, "시공단계 부력 검토 상세 보고서", fmts["title"])
+    ws.write(1, 0, f"출력 일시: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    ok = trace.fs >= inputs["target_fs"]
+    summary = [
+        ("총 하중 (ΣW)", trace.total_w, fmts["num"]), ("총 부력 (ΣU)", trace.u_total, fmts["num"]),
+        ("안전율 (FS)", trace.fs, fmts["fs"]), ("목표 안전율", inputs["target_fs"], fmts["fs"]),
+        ("지하수위 (GL-m)", inputs["gl_minus"], fmts["fs"]),
+    ]
+    row = 3
+    ws.write(row, 0, "검토 결과", fmts["section"]); row += 1
+    for label, value, fmt in summary:
+        ws.write(row, 0, label, fmts["text"]); ws.write_number(row, 1, value, fmt); row += 1
+    ws.write(row, 0, "판정", fmts["text"]); ws.write(row, 1, "OK" if ok else "NG", fmts["ok" if ok else "ng"]); row += 2
+
+    row = _write_table(ws, fmts, row, "지붕층(Roof)", DETAIL_COLUMNS, trace.roof)
+    for i, floor_terms in enumerate(trace.floors):
+        row = _write_table(ws, fmts, row, f"지하 {i+1}층", DETAIL_COLUMNS, floor_terms)
+    _write_table(ws, fmts, row, "부력(U)", U_COLUMNS, trace.uplift)
+
+    if with_drawing:
+        png = section_png(inputs["h_soil"], tuple(inputs["h"]), inputs["fd"], inputs["gl_minus"])
+        ws.insert_image(3, 4, "section.png", {"image_data": io.BytesIO(png), "x_scale": 0.5, "y_scale": 0.5})
+    return ws
+
+
+def write_report(target, scenarios, with_drawing=True):
+    """(시트 이름, 입력) 반복자를 시트별 계산서로 기록
+
+    target이 파일 경로이면 constant_memory 모드, BytesIO 등 파일 객체이면
+    메모리 내 작성 (앱 다운로드용)으로 연다.
+    """
+    options = {"constant_memory": True} if isinstance(target, str) else {"in_memory": True}
+    workbook = xlsxwriter.Workbook(target, options)
+    fmts = _formats(workbook); used = set()
+    for name, inputs in scenarios:
+        write_scenario_sheet(workbook, fmts, sheet_name(name, used), inputs, with_drawing)
+    workbook.close()
+    return target
+
+
+def report_bytes(scenarios, with_drawing=True):
+    return write_report(io.BytesIO(), scenarios, with_drawing).getvalue()
+
+
+class BatchSheetWriter:
+    """일괄 실행 결과 표를 constant_memory 모드로 이어 쓰기, 엑셀 행 한도를 넘으면 다음 시트로 넘긴다"""
+
+    def __init__(self, path, sheet="결과"):
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.fmts = _formats(self.workbook)
+        self.sheet = sheet
+        self.columns = None
+        self.ws = None
+        self.pages = 0
+        self.row = 0
+
+    def _new_sheet(self):
+        self.pages += 1
+        self.ws = self.workbook.add_worksheet(self.sheet if self.pages == 1 else f"{self.sheet}_{self.pages}")
+        for c, col in enumerate(self.columns): self.ws.write(0, c, col, self.fmts["head"])
+        self.row = 1
+
+    def write(self, frame):
+        if self.columns is None:
+            self.columns = [str(c) for c in frame.columns]
+            self._new_sheet()
+        for values in frame.itertuples(index=False):
+            if self.row >= EXCEL_MAX_ROWS: self._new_sheet()
+            for c, value in enumerate(values):
+                if isinstance(value, str): self.ws.write_string(self.row, c, value)
+                elif value != value: self.ws.write_blank(self.row, c, None)
+                else: self.ws.write(self.row, c, value)
+            self.row += 1
+
+    def close(self):
+        self.workbook.close()
@@ -0,0 +1,53 @@
+"""일괄 실행 검사: 결과가 evaluate와 같고 빈 칸은 앱 기본값으로 채운다"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from buoyancy_batch import evaluate_frame, run_batch
+from buoyancy_engine import default_inputs, evaluate, flat_inputs
+
+
+def test_evaluate_frame_matches_evaluate():
+    rows = [dict(flat_inputs(default_inputs(nf, gl_minus=gl, x_dist=7000 + 100 * nf)), num_floors=nf)
+            for nf in (1, 2, 3) for gl in (0.5, 2.35, 6.0)]
+    out = evaluate_frame(pd.DataFrame(rows))
+    for row, (_, res) in zip(rows, out.iterrows()):
+        ref = evaluate(default_inputs(row["num_floors"], gl_minus=row["gl_minus"], x_dist=row["x_dist"]))
+        assert res["fs"] == pytest.approx(float(ref.fs), rel=1e-12)
+        assert res["result"] == ("OK" if ref.ok else "NG")
+
+
+def test_blank_cells_use_defaults(tmp_path):
+    src = tmp_path / "bays.csv"
+    src.write_text("bay,num_floors,gl_minus,h_0,h_1,done_1\nA,2,2.35,4050,,\nB,,,,5380,1\n", encoding="utf-8")
+    run_batch(str(src), str(tmp_path / "out.csv"), workers=1)
+    out = pd.read_csv(tmp_path / "out.csv")
+    ref = evaluate(default_inputs(2))
+    assert out["bay"].tolist() == ["A", "B"]
+    assert out["total_w"].tolist() == pytest.approx([float(ref.total_w)] * 2, rel=1e-12)
+    assert out["fs"].tolist() == pytest.approx([float(ref.fs)] * 2, rel=1e-12)
+
+
+def test_floor_count_from_header(tmp_path):
+    src = tmp_path / "bays.csv"
+    pd.DataFrame([flat_inputs(default_inputs(4))]).to_csv(src, index=False)
+    run_batch(str(src), str(tmp_path / "out.csv"), workers=1)
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert out["fs"].iloc[0] == pytest.approx(float(evaluate(default_inputs(4)).fs), rel=1e-12)
+    assert list(out.columns) == ["total_w", "u_total", "fs", "result"]
+    with pytest.raises(ValueError, match="층수 2"):
+        run_batch(str(src), str(tmp_path / "out2.csv"), workers=1, num_floors=2)
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet", "xlsx"])
+def test_mixed_floor_chunks_keep_columns(tmp_path, suffix):
+    rows = [dict(flat_inputs(default_inputs(nf, gl_minus=1.0 + 0.1 * k)), num_floors=nf, bay=f"B{k}")
+            for k, nf in enumerate([2, 3] * 25)]
+    src = tmp_path / "bays.csv"; dst = tmp_path / f"out.{suffix}"
+    pd.DataFrame(rows).to_csv(src, index=False)
+    if suffix == "xlsx": pytest.importorskip("openpyxl")
+    assert run_batch(str(src), str(dst), chunksize=7, workers=2) == 50
+    out = {"csv": pd.read_csv, "parquet": pd.read_parquet, "xlsx": pd.read_excel}[suffix](dst)
+    assert list(out.columns) == ["num_floors", "bay", "total_w", "u_total", "fs", "result"]
+    expected = [float(evaluate(default_inputs(r["num_floors"], gl_minus=r["gl_minus"])).fs) for r in rows]
+    np.testing.assert_allclose(out["fs"].to_numpy(dtype=float), expected, rtol=1e-9)
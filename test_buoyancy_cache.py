@@ -0,0 +1,31 @@
+"""공유 캐시 검사: 입력 표기가 달라도 같은 키, 메모리/디스크 한도 유지"""
+import time
+
+from buoyancy_cache import ResultCache, calc_key
+from buoyancy_engine import default_inputs
+
+
+def test_key_ignores_int_float_and_extra_fields():
+    a = default_inputs(2); b = default_inputs(2, x_dist=8200.0, h=(4050.0, 5380), note="무시")
+    assert calc_key(a) == calc_key(b)
+    assert calc_key(a) != calc_key(default_inputs(2, x_dist=8200.5))
+
+
+def test_memory_lru_limit():
+    cache = ResultCache(max_bytes=4000)
+    for i in range(20): cache.put("svg", str(i), "x" * 1000)
+    assert cache.bytes <= 4000 and cache.get("svg", "19") is not None and cache.get("svg", "0") is None
+
+
+def test_disk_store_is_pruned(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache(path=path, max_disk_bytes=20_000, prune_every=5)
+    for i in range(100): cache.put("svg", str(i), "x" * 1000)
+    db = cache._db()
+    size, count = db.execute("SELECT SUM(LENGTH(value)), COUNT(*) FROM results").fetchone()
+    assert size <= 20_000 + 5 * 1100 and count < 100
+    assert ResultCache(path=path).get("svg", "99") == "x" * 1000  # 최신 항목은 남는다
+
+    with db: db.execute("UPDATE results SET created = ?", (time.time() - 40 * 86400,))
+    assert ResultCache(path=path).prune() == 0  # 열 때 이미 정리
+    assert db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
@@ -0,0 +1,190 @@
+"""계산 엔진 회귀 검사: 기존 앱 인라인 계산식과의 일치, 의존성 그래프 증분 계산"""
+import numpy as np
+import pytest
+
+from buoyancy_engine import (
+    buildable_states, calc_details, construction_stages, critical_gwl, default_inputs, evaluate, explore_sequences, flat_inputs,
+    fs_curve, with_stages,
+)
+from buoyancy_graph import build_graph
+
+
+def legacy(inputs):
+    """기존 buoyancy_app.py의 계산 로직 (ΣW, ΣU, FS, 계산 근거 표)을 그대로 옮긴 기준값"""
+    unit_c = inputs["unit_c"]; x_dist = inputs["x_dist"]; y_dist = inputs["y_dist"]; fd = inputs["fd"]
+    area = (x_dist * y_dist) / 10**6; num_floors = len(inputs["h"]); floor_heights = inputs["h"]
+    t_topping = inputs["t_topping"]; t_plain_r = inputs["t_plain_r"]; t_slab_r = inputs["t_slab_r"]; l_cl_r = inputs["l_cl_r"]
+    t_slab_mid = inputs["t_slab_mid"]; l_cl_f = inputs["l_cl_f"]; t_plain_bot = inputs["t_plain_bot"]; t_slab_bot = inputs["t_slab_bot"]
+    fw = inputs["fw"]; flv = inputs["flv"]
+    roof_load = (18 * t_topping / 1000) + (23 * t_plain_r / 1000) + (unit_c * t_slab_r / 1000) + l_cl_r
+    floor_load_mid = (unit_c * t_slab_mid / 1000) + l_cl_f
+    floor_load_bot = (23 * t_plain_bot / 1000) + (unit_c * t_slab_bot / 1000)
+
+    def get_step(w, h, t, l, m): return unit_c * (w/1000) * (h/1000 - t/1000) * l * m, f"{unit_c} x {w/1000} x ({h/1000} - {t/1000}) x {l} x {m}"
+
+    total_w = 0; roof_calc = []; floor_calcs = []
+    m_r = 1.0 if inputs["roof_done"] else 0.0
+    w_rs = roof_load * area * m_r; total_w += w_rs
+    roof_calc.append(["지붕층 슬래브", f"({18}*({t_topping/1000}) + {23}*({t_plain_r/1000}) + {unit_c}*({t_slab_r/1000}) + {l_cl_r}) x {area:.2f} x {m_r}", f"{w_rs:,.2f}"])
+    for name, w, h, l in (("B1", "bw_rb1", "bh_rb1", x_dist), ("G1", "bw_rg1", "bh_rg1", y_dist), ("G2", "bw_rg2", "bh_rg2", x_dist)):
+        v, e = get_step(inputs[w], inputs[h], t_slab_r, l/1000, m_r); roof_calc.append([f"지붕층 {name}", e, f"{v:,.2f}"]); total_w += v
+
+    for i in range(num_floors):
+        tf, fl, tp, lc = (t_slab_mid, floor_load_mid, 0, l_cl_f) if i < num_floors-1 else (t_slab_bot, floor_load_bot, t_plain_bot, 0)
+        fh = floor_heights[i]/1000; m_f = 1.0 if inputs["done"][i] else 0.0; f_rows = []
+        bw_c = inputs["bw_c"][i]; bh_c = inputs["bh_c"][i]
+        w_c = unit_c * (bw_c/1000) * (bh_c/1000) * fh * m_f
+        f_rows.append([f"지하{i+1}층 기둥", f"{unit_c} x {bw_c/1000} x {bh_c/1000} x {fh} x {m_f}", f"{w_c:,.2f}"]); total_w += w_c
+        if i == num_floors-1:
+            fa = (fw*flv)/10**6; w_sn = fl*(area-fa)*m_f; w_ft = (fl + unit_c*(fd/1000 - tf/1000))*fa
+            f_expr = f"({23}*({tp/1000}) + {unit_c}*({tf/1000}))"
+            f_rows.append([f"지하{i+1}층 슬래브", f"{f_expr} x ({area:.2f}-{fa:.2f}) x {m_f}", f"{w_sn:,.2f}"])
+            f_rows.append([f"지하{i+1}층 기초부", f"({f_expr} + {unit_c} x ({fd/1000}-{tf/1000})) x {fa:.2f}", f"{w_ft:,.2f}"])
+            total_w += (w_sn + w_ft)
+        else:
+            ws = fl*area*m_f; f_expr = f"({unit_c}*({tf/1000}) + {lc})"
+            f_rows.append([f"지하{i+1}층 슬래브", f"{f_expr} x {area:.2f} x {m_f}", f"{ws:,.2f}"]); total_w += ws
+            for name, l in (("b1", x_dist), ("g1", y_dist), ("g2", x_dist)):
+                v, e = get_step(inputs[f"bw_{name}"][i], inputs[f"bh_{name}"][i], tf, l/1000, m_f)
+                f_rows.append([f"지하{i+1}층 {name.upper()}", e, f"{v:,.2f}"]); total_w += v
+        floor_calcs.append(f_rows)
+
+    ht = (inputs["h_soil"]+sum(floor_heights))/1000; wh = ht - inputs["gl_minus"]; fa = (fw*flv)/10**6
+    u1 = 10 * (wh + t_slab_bot/1000) * (area-fa); u2 = 10 * (wh + fd/1000) * fa
+    u_total = u1 + u2; fs_val = total_w / u_total if u_total > 0 else 0
+    u_rows = [
+        ["일반구간 부력 (U1)", f"10 x ({wh:.3f} + {t_slab_bot/1000}) x ({area:.2f} - {fa:.2f})", f"{u1:,.2f}"],
+        ["기초구간 부력 (U2)", f"10 x ({wh:.3f} + {fd/1000}) x {fa:.2f}", f"{u2:,.2f}"],
+        ["총 부력 합계 (ΣU)", "U1 + U2", f"{u_total:,.2f}"],
+    ]
+    return {"total_w": total_w, "u_total": u_total, "fs": fs_val, "roof_calc": roof_calc, "floor_calcs": floor_calcs, "u_rows": u_rows}
+
+
+def random_inputs(rng, num_floors):
+    """앱 입력 범위의 정수 치수 시나리오 (시공 완료 여부와 지하수위도 임의)"""
+    r = lambda lo, hi: int(rng.integers(lo, hi) // 50 * 50)
+    return default_inputs(
+        num_floors,
+        x_dist=r(4000, 12000), y_dist=r(4000, 12000), h_soil=r(0, 3000), fd=r(600, 2000),
+        gl_minus=round(float(rng.uniform(0, 8)), 2), unit_c=float(rng.choice([23.0, 24.0, 25.0])),
+        t_topping=r(0, 1500), t_plain_r=r(0, 300), t_slab_r=r(150, 400), t_slab_mid=r(150, 300),
+        t_plain_bot=r(0, 300), t_slab_bot=r(300, 600), roof_done=bool(rng.integers(2)),
+        bw_rb1=r(300, 800), bh_rb1=r(600, 1200), bw_rg1=r(300, 800), bh_rg1=r(600, 1200), bw_rg2=r(300, 800), bh_rg2=r(600, 1200),
+        fw=r(1000, 3500), flv=r(1000, 3500),
+        h=[r(3000, 6000) for _ in range(num_floors)], done=[bool(d) for d in rng.integers(2, size=num_floors)],
+        bw_b1=[r(300, 600) for _ in range(num_floors)], bh_b1=[r(500, 900) for _ in range(num_floors)],
+        bw_g1=[r(300, 600) for _ in range(num_floors)], bh_g1=[r(500, 900) for _ in range(num_floors)],
+        bw_g2=[r(300, 600) for _ in range(num_floors)], bh_g2=[r(500, 900) for _ in range(num_floors)],
+        bw_c=[r(400, 900) for _ in range(num_floors)], bh_c=[r(400, 900) for _ in range(num_floors)],
+    )
+
+
+SCENARIOS = [random_inputs(np.random.default_rng(seed), 1 + seed % 5) for seed in range(300)]
+
+
+def test_default_matches_app_result():
+    res = evaluate(default_inputs(2))
+    assert float(res.total_w) == pytest.approx(3491.81, abs=0.005)
+    assert float(res.u_total) == pytest.approx(5881.43, abs=0.005)
+    assert float(res.fs) == pytest.approx(0.5937, abs=5e-5)
+    assert not bool(res.ok)
+
+
+@pytest.mark.parametrize("inputs", SCENARIOS)
+def test_evaluate_matches_legacy(inputs):
+    ref = legacy(inputs); res = evaluate(inputs)
+    assert float(res.total_w) == pytest.approx(ref["total_w"], rel=1e-12)
+    assert float(res.u_total) == pytest.approx(ref["u_total"], rel=1e-12)
+    assert float(res.fs) == pytest.approx(ref["fs"], rel=1e-12)
+    assert bool(res.ok) == (ref["fs"] >= inputs["target_fs"])
+
+
+@pytest.mark.parametrize("inputs", SCENARIOS[:60])
+def test_calc_details_matches_legacy(inputs):
+    ref = legacy(inputs); details = calc_details(inputs)
+    for key in ("total_w", "u_total", "fs"): assert details[key] == pytest.approx(ref[key], rel=1e-12)
+    for key in ("roof_calc", "floor_calcs", "u_rows"): assert details[key] == ref[key]
+
+
+def test_evaluate_batch_matches_single():
+    """같은 층수 시나리오를 (N,) 배열로 묶어 계산해도 한 건씩 계산한 값과 같다"""
+    group = [s for s in SCENARIOS if len(s["h"]) == 3]
+    stacked = {name: np.array([s[name] for s in group]) for name in group[0]}
+    res = evaluate(stacked)
+    np.testing.assert_allclose(res.fs, [float(evaluate(s).fs) for s in group], rtol=1e-12)
+
+
+def test_graph_matches_evaluate():
+    for inputs in SCENARIOS[:50]:
+        g = build_graph(len(inputs["h"]), inputs)
+        ref = evaluate(inputs)
+        assert g["total_w"] == pytest.approx(float(ref.total_w), rel=1e-12)
+        assert g["u_total"] == pytest.approx(float(ref.u_total), rel=1e-12)
+        assert g["fs"] == pytest.approx(float(ref.fs), rel=1e-12)
+
+
+def test_graph_incremental_update():
+    """입력 하나를 바꾸면 하위 노드만 다시 계산하고 결과는 처음부터 계산한 값과 같다"""
+    rng = np.random.default_rng(7)
+    inputs = default_inputs(3)
+    g = build_graph(3, inputs); g["fs"]
+    full = g.recomputed
+    edits = [("gl_minus", 3.1), ("bw_c_1", 650), ("done_0", False), ("t_topping", 900), ("roof_done", False), ("h_2", 4800.5)]
+    for name, value in edits:
+        base, _, i = name.rpartition("_")
+        if base in inputs and isinstance(inputs[base], list):
+            inputs[base] = list(inputs[base]); inputs[base][int(i)] = value
+        else:
+            inputs[name] = value
+        before = g.recomputed
+        g.update(flat_inputs(inputs))
+        assert g["fs"] == pytest.approx(float(evaluate(inputs).fs), rel=1e-12)
+        assert 0 < g.recomputed - before < full
+
+    # 값이 같은 입력은 무효화하지 않는다
+    before = g.recomputed
+    g.update(flat_inputs(inputs)); g["fs"]
+    assert g.recomputed == before
+
+    for _ in range(20):
+        inputs["x_dist"] = float(rng.integers(5000, 10000)); inputs["gl_minus"] = float(rng.uniform(0, 6))
+        g.update(flat_inputs(inputs))
+        assert g["fs"] == pytest.approx(float(evaluate(inputs).fs), rel=1e-12)
+
+
+@pytest.mark.parametrize("inputs", SCENARIOS[:40])
+def test_critical_gwl_gives_target_fs(inputs):
+    stages = construction_stages(len(inputs["h"]))
+    staged = with_stages(inputs, stages)
+    gl = critical_gwl(staged, target_fs=1.2)
+    np.testing.assert_allclose(evaluate(dict(staged, gl_minus=gl)).fs, 1.2, rtol=1e-10)
+
+
+def test_fs_curve_matches_evaluate():
+    inputs = SCENARIOS[3]; gl_grid = np.linspace(0, 6, 13)
+    curve = fs_curve(inputs, gl_grid)
+    np.testing.assert_allclose(curve, [float(evaluate(dict(inputs, gl_minus=gl)).fs) for gl in gl_grid], rtol=1e-12)
+
+
+@pytest.mark.parametrize("inputs", SCENARIOS[:20])
+def test_explore_sequences_states_match_evaluate(inputs):
+    num_f = len(inputs["h"])
+    seq = explore_sequences(inputs)
+    assert seq.fs.size == 2 ** (num_f + 1)
+    done = seq.bits[:, :num_f]; roof_done = seq.bits[:, num_f]
+    np.testing.assert_allclose(seq.fs, evaluate(dict(inputs, done=done, roof_done=roof_done)).fs, rtol=1e-12)
+
+
+@pytest.mark.parametrize("num_floors", [1, 2, 3, 6])
+def test_sequence_order_is_buildable(num_floors):
+    inputs = default_inputs(num_floors)
+    floors = [f"B{i+1}F" for i in range(num_floors)]
+    bottom_up = explore_sequences(inputs, allowed=buildable_states(num_floors, ["bottom_up"]))
+    assert bottom_up.order == floors[::-1] + ["지붕층"]
+    stages = construction_stages(num_floors)
+    np.testing.assert_allclose(bottom_up.path_fs, evaluate(with_stages(inputs, stages)).fs, rtol=1e-12)
+    top_down = explore_sequences(inputs, allowed=buildable_states(num_floors, ["top_down"]))
+    assert top_down.order == ["지붕층"] + floors
+    both = explore_sequences(inputs, allowed=buildable_states(num_floors))
+    assert both.order in (bottom_up.order, top_down.order)
+    assert both.path_shortfall == min(bottom_up.path_shortfall, top_down.path_shortfall)
@@ -0,0 +1,30 @@
+"""베이 격자 검사: 베이별 결과가 evaluate와 같고 값이 바뀐 베이만 다시 계산"""
+import numpy as np
+import pytest
+
+from buoyancy_engine import default_inputs, evaluate
+from buoyancy_grid import BayGrid
+
+
+def test_grid_matches_evaluate_and_keeps_spans():
+    x_spans = [8200.1, 7300.7, 9100.3]; y_spans = [8200.6, 6400.9]
+    grid = BayGrid(x_spans, y_spans, default_inputs(2))
+    assert grid.x_spans.tolist() == x_spans and grid.y_spans.tolist() == y_spans
+    _, _, fs, _ = grid.evaluate()
+    for bay in range(grid.size):
+        ref = evaluate(default_inputs(2, x_dist=x_spans[grid.cols[bay]], y_dist=y_spans[grid.rows[bay]]))
+        assert fs[bay] == pytest.approx(float(ref.fs), rel=1e-12)
+
+
+def test_only_changed_bays_recomputed():
+    grid = BayGrid([8200] * 4, [8200] * 3, default_inputs(2)); grid.evaluate()
+    start = grid.recomputed
+    grid.update(np.arange(grid.size), gl_minus=2.35); grid.evaluate()
+    assert grid.recomputed == start
+    bays = grid.bays_in(0, 0, 8000, 16000)
+    grid.update(bays, gl_minus=1.0); grid.evaluate()
+    assert grid.recomputed - start == len(bays) == 2
+    grid.set_span("x", 3, 6000.5); grid.evaluate()
+    assert grid.recomputed - start == 2 + 3
+    assert grid.x_spans[3] == 6000.5 and grid.x_edges[-1] == pytest.approx(3 * 8200 + 6000.5)
+    assert grid.fs[grid.bay_index(0, 3)] == pytest.approx(float(evaluate(default_inputs(2, x_dist=6000.5)).fs), rel=1e-12)
@@ -0,0 +1,66 @@
+"""시나리오 라이브러리 검사: 저장 → 불러오기 → 재계산 왕복에서 입력과 결과가 바뀌지 않는다"""
+import json
+import sqlite3
+
+import pytest
+
+import buoyancy_engine
+from buoyancy_engine import default_inputs, evaluate
+from buoyancy_library import FORMAT_VERSION, ScenarioLibrary
+
+
+@pytest.fixture
+def library(tmp_path):
+    return ScenarioLibrary(str(tmp_path / "scenarios.db"))
+
+
+def test_round_trip_keeps_non_integer_inputs(library):
+    inputs = default_inputs(2, x_dist=8200.6, h=[4050.5, 5380.9], t_slab_bot=400.7, bw_c=[500.5, 700.25],
+                            gl_minus=2.35, done=[False, True], roof_done=False)
+    sid = library.save("A동", "X1-Y1", inputs)
+    loaded = library.load(sid)
+    assert loaded == {k: inputs[k] for k in loaded}
+    assert isinstance(loaded["roof_done"], bool) and all(isinstance(d, bool) for d in loaded["done"])
+
+    fs = next(library.query()).fs
+    assert fs == float(evaluate(inputs).fs)
+    assert library.reevaluate() == (1, 0)
+    assert next(library.query()).fs == fs
+
+
+def test_diff_shows_fractional_changes(library):
+    a = library.save("A동", "X1-Y1", default_inputs(2))
+    b = library.save("A동", "X1-Y1", default_inputs(2, x_dist=8200.4))
+    names = [name for name, _, _ in library.diff(a, b)]
+    assert names[0] == "x_dist" and "fs" in names
+
+
+def test_save_stages_and_query(library):
+    assert library.save_stages("A동", "X1-Y1", default_inputs(2, gl_minus=3.5)) == 4
+    assert library.count(project="A동") == 4
+    rows = list(library.query(ok=False, gwl_above=4.0))
+    assert rows and [r.fs for r in rows] == sorted(r.fs for r in rows)
+    assert all(r.fs < 1.2 for r in rows) and len(rows) == library.count(ok=False, gwl_above=4.0)
+
+
+def test_default_change_does_not_alter_saved(library, monkeypatch):
+    inputs = default_inputs(2)
+    sid = library.save("A동", "X1-Y1", inputs); fs = next(library.query()).fs
+    monkeypatch.setitem(buoyancy_engine.SCALAR_DEFAULTS, "t_topping", 900)
+    monkeypatch.setitem(buoyancy_engine.FLOOR_DEFAULTS, "bw_c", 600)
+    assert library.load(sid) == inputs
+    assert library.reevaluate() == (1, 0) and next(library.query()).fs == fs
+
+
+def test_upgrades_diff_only_format(tmp_path):
+    path = str(tmp_path / "old.db")
+    ScenarioLibrary(path)
+    inputs = default_inputs(2, x_dist=9000.5)
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA user_version = 1")
+        conn.execute("INSERT INTO scenarios (project, bay, stage, name, num_floors, gl_minus, target_fs, inputs) "
+                     "VALUES ('A동', 'X1-Y1', '지붕층', '', 2, 2.35, 1.2, ?)", (json.dumps({"x_dist": 9000.5}),))
+    library = ScenarioLibrary(path)
+    assert library.load(1) == inputs
+    stored = json.loads(library._db().execute("SELECT inputs FROM scenarios").fetchone()[0])
+    assert len(stored) > 40 and library._db().execute("PRAGMA user_version").fetchone()[0] == FORMAT_VERSION
@@ -0,0 +1,39 @@
+"""지하수위 감시 검사: FS가 엔진과 같고, 정지/임대 만료 시 소켓 포트를 놓는다"""
+import socket
+import time
+
+import pytest
+
+from buoyancy_engine import construction_stages, default_inputs, evaluate, with_stages
+from buoyancy_monitor import GroundwaterMonitor, MonitorThread, socket_readings
+
+
+def test_fs_matches_engine():
+    inputs = default_inputs(2); stages = construction_stages(2)
+    monitor = GroundwaterMonitor(inputs)
+    for gl in (0.0, 2.35, 5.0, 50.0):
+        ref = evaluate(with_stages(dict(inputs, gl_minus=gl), stages)).fs[-1]
+        assert monitor.fs_at(gl) == pytest.approx(float(ref), rel=1e-12)
+    assert monitor.fs_at(50.0) == 0.0  # 부력 0 이하는 엔진과 같이 0
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+
+def test_lease_expiry_releases_port():
+    port = _free_port(); monitor = GroundwaterMonitor(default_inputs(2))
+    thread = MonitorThread(monitor, lambda: socket_readings(port=port), lease=0.5); thread.start()
+    time.sleep(0.2)
+    client = socket.create_connection(("127.0.0.1", port)); client.sendall(b"P-01,2.0\n")
+    thread.join(5)
+    client.close()
+    assert not thread.is_alive() and thread.expired and thread.error is None
+    assert monitor.snapshot()["count"] == 1
+
+    again = MonitorThread(monitor, lambda: socket_readings(port=port)); again.start()
+    time.sleep(0.2)
+    assert again.is_alive() and again.error is None
+    again.stop()
+    assert not again.is_alive()
@@ -0,0 +1,25 @@
+"""신뢰성 검토 검사: 분포 변환의 평균/표준편차, 확정 입력에서의 파괴확률"""
+import numpy as np
+import pytest
+
+from buoyancy_engine import construction_stages, default_inputs, evaluate, with_stages
+from buoyancy_reliability import around, monte_carlo, transform
+
+
+@pytest.mark.parametrize("kind", ["normal", "lognormal", "uniform"])
+def test_around_keeps_mean_and_sd(kind):
+    dist = around(24.0, sd=1.0, kind=kind)
+    rng = np.random.default_rng(0)
+    z = rng.random(400_000) if kind == "uniform" else rng.standard_normal(400_000)
+    x = transform(dist, z)
+    assert x.mean() == pytest.approx(24.0, abs=0.01) and x.std() == pytest.approx(1.0, abs=0.01)
+    if kind == "uniform": assert dist.loc < dist.scale and x.min() >= dist.loc and x.max() <= dist.scale
+
+
+def test_narrow_distribution_matches_deterministic():
+    inputs = default_inputs(2, gl_minus=6.0)
+    stages = construction_stages(2)
+    fs = evaluate(with_stages(inputs, stages)).fs
+    res = monte_carlo(inputs, {"gl_minus": around(6.0, sd=1e-9)}, n_samples=2000, seed=1)
+    np.testing.assert_allclose(res.fs_mean, fs, rtol=1e-6)
+    np.testing.assert_array_equal(res.p_fail, (fs < inputs["target_fs"]).astype(float))